@@ -1,19 +1,108 @@
+import argparse
+import asyncio
 import logging
+import sys
 import time
-from src.Preprocessing import preprocessor
-from src.Scraping.RedditScraper import RedditScraper
-from src.EDA import analysis
+from src.Scraping.PostStore import PostStore, DEFAULT_STORE_PATH
+from src.Pipeline.runner import run_pipeline
+from src.Pipeline import instrumentation
+from src.EDA.backends import BACKENDS
+from src.EDA.combined import CombinedAnalysis
+from src.EDA.search import DEFAULT_INDEX_PATH, SearchIndex
+from src.Preprocessing.preprocessor import PROCESSED_FORMATS
 from dotenv import dotenv_values  # type: ignore
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape, preprocess and analyse subreddits.")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of subreddit/sort-method fetches to run in parallel (1 = serial)."
+    )
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="Scrape with the asyncio client: every subreddit and comment fetch on one event loop."
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only fetch posts newer than the last run, keeping history in a local store, "
+             "and reuse cached analysis results for unchanged blocks."
+    )
+    parser.add_argument(
+        "--store", default=DEFAULT_STORE_PATH,
+        help="Path of the SQLite post store used by --incremental."
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1,
+        help="Number of subreddits to preprocess and analyse in parallel processes."
+    )
+    parser.add_argument(
+        "--score-jobs", type=int, default=1,
+        help="Number of worker processes each analysis uses to score sentiment (large batches only)."
+    )
+    parser.add_argument(
+        "--backend", choices=sorted(BACKENDS), default="vader",
+        help="Sentiment backend used by the analysis. 'sklearn' loads the model saved by "
+             "'python -m src.EDA.backends --fit-model' if there is one, else distils VADER first."
+    )
+    parser.add_argument(
+        "--no-plots", dest="plots", action="store_false",
+        help="Only write Export.json/Words.json, skip rendering the PostEDA figures."
+    )
+    parser.add_argument(
+        "--processed-format", choices=PROCESSED_FORMATS, default=None,
+        help="Format of the intermediate files in data/processed/ (parquet/feather are columnar). "
+             "Defaults to json, or parquet with --chunk-size."
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=None,
+        help="Analyse processed files out-of-core, this many posts at a time (disables plots)."
+    )
+    parser.add_argument(
+        "--ngram-capacity", type=int, default=None,
+        help="Bound n-gram counting memory to this many entries per n (approximate counts; exact when unset)."
+    )
+    parser.add_argument(
+        "--dedup", action="store_true",
+        help="Skip near-duplicate posts (reposts, copy-pasted announcements) in the analysis."
+    )
+    parser.add_argument(
+        "--combined", action="store_true",
+        help="Also write a cross-subreddit report to data/PostEDA/combined/."
+    )
+    parser.add_argument(
+        "--search-index", action="store_true",
+        help=f"Also update the keyword search index ({DEFAULT_INDEX_PATH}); query it with python -m src.EDA.search."
+    )
+    parser.add_argument(
+        "--report", default=None,
+        help="Write a JSON run report (wall/CPU time, peak RSS and item counts per stage and subreddit)."
+    )
+    parser.add_argument(
+        "--profile-dir", default=None,
+        help="Also dump cProfile stats (scrape.prof, <subreddit>.prof) into this directory."
+    )
+    args = parser.parse_args()
+    if args.processed_format is None:
+        # Only columnar files can be read a chunk at a time; JSON is always loaded whole
+        args.processed_format = "parquet" if args.chunk_size else "json"
+    elif args.chunk_size and args.processed_format == "json":
+        logging.warning("--chunk-size with --processed-format json loads each file whole; "
+                        "use parquet or feather to bound memory")
+    return args
+
+
 def main():
+    # Library modules only create loggers; the entry point decides where output goes
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s',
+                        handlers=[logging.StreamHandler(sys.stdout)])
+    args = parse_args()
+    if args.use_async and args.incremental:
+        raise SystemExit("--async does not support --incremental yet")
     config = dotenv_values(".env")
-    scraper = RedditScraper(
-        client_id=config["CLIENT_ID"],
-        client_secret=config["CLIENT_SECRET"],
-        user_agent=config["USER_AGENT"],
-        get_comments=False
-    )
+
+    instrument = bool(args.report or args.profile_dir)
+    recorder = instrumentation.enable(args.profile_dir) if instrument else None
 
     start_time = time.time()
     logging.info("Starting scraping...")
@@ -29,13 +118,39 @@ def main():
     # Collect posts from various subreddits
 
     try:
-
-        data = [scraper.collect_posts(subreddit, 100) for subreddit in name_subreddit]
-        # data_facebook, filename_facebook = scraper.collect_posts("facebook", 100)
-        # data_nvidia, filename_nvidia = scraper.collect_posts("nvidia", 100)
-        # data_tesla, filename_tesla = scraper.collect_posts("teslamotors", 100)
-        # data_Amd, filename_Amd = scraper.collect_posts("Amd", 100)
-        # data_spacex, filename_spacex = scraper.collect_posts("spacex", 100)
+        with instrumentation.profile("scrape"):
+            # Each client pulls in its own HTTP stack (aiohttp or PRAW); only import the one in use
+            if args.use_async:
+                from src.Scraping.AsyncRedditScraper import AsyncRedditScraper
+                async_scraper = AsyncRedditScraper(
+                    client_id=config["CLIENT_ID"],
+                    client_secret=config["CLIENT_SECRET"],
+                    user_agent=config["USER_AGENT"],
+                    get_comments=False,
+                    max_concurrency=max(args.workers, 1),
+                )
+                data = asyncio.run(async_scraper.collect_many(name_subreddit, 100))
+            else:
+                from src.Scraping.RedditScraper import RedditScraper
+                scraper = RedditScraper(
+                    client_id=config["CLIENT_ID"],
+                    client_secret=config["CLIENT_SECRET"],
+                    user_agent=config["USER_AGENT"],
+                    get_comments=False,
+                    max_concurrency=max(args.workers, 1),
+                    store=PostStore(args.store) if args.incremental else None
+                )
+                if args.incremental:
+                    data = [scraper.collect_incremental(subreddit, 100) for subreddit in name_subreddit]
+                elif args.workers > 1:
+                    data = scraper.collect_many(name_subreddit, 100, max_workers=args.workers)
+                else:
+                    data = [scraper.collect_posts(subreddit, 100) for subreddit in name_subreddit]
+            # data_facebook, filename_facebook = scraper.collect_posts("facebook", 100)
+            # data_nvidia, filename_nvidia = scraper.collect_posts("nvidia", 100)
+            # data_tesla, filename_tesla = scraper.collect_posts("teslamotors", 100)
+            # data_Amd, filename_Amd = scraper.collect_posts("Amd", 100)
+            # data_spacex, filename_spacex = scraper.collect_posts("spacex", 100)
 
     finally:
         total_time = time.time() - start_time
@@ -46,20 +161,31 @@ def main():
             f"Total scraping time: {int(hours)}h {int(minutes)}m {seconds:.2f}s"
         )
 
-    # Preprocess the data
-    for posts, filename in data:
-        logging.info(f"Preprocessing data from {filename}")
-        fp=preprocessor.create_preprocessed_json_by_blocks_of_days(filename)
-        logging.info(f"Preprocessed data saved to {fp}")
-
-        nfp = analysis.CompleteAnalysis(fp)
-        logging.info(f"EDA Completed and save to {nfp}")
+    # Preprocess and analyse the data, one process per subreddit
+    results = run_pipeline([filename for posts, filename in data], jobs=args.jobs, backend=args.backend,
+                           plots=args.plots, processed_format=args.processed_format,
+                           incremental=args.incremental, chunk_size=args.chunk_size,
+                           ngram_capacity=args.ngram_capacity, score_jobs=args.score_jobs,
+                           instrument=instrument, profile_dir=args.profile_dir, dedup=args.dedup)
+    failed = [r.raw_path for r in results if not r.ok]
+    if failed:
+        logging.error(f"Pipeline failed for {len(failed)} of {len(results)} subreddits: {failed}")
 
-    
+    processed = [r.processed_path for r in results if r.ok]
+    if args.combined and processed:
+        with instrumentation.stage("CombinedAnalysis", items=len(processed)):
+            CombinedAnalysis(processed, backend=args.backend, jobs=args.score_jobs)
+    if args.search_index and processed:
+        with instrumentation.stage("SearchIndex", items=len(processed)), SearchIndex() as index:
+            index.index_files(processed, backend=args.backend, jobs=args.score_jobs)
 
+    if args.report:
+        for result in results:
+            recorder.merge(result.stages or [])
+        instrumentation.write_report(args.report, recorder.snapshot(), start_time, argv=sys.argv[1:],
+                                     subreddits=name_subreddit, failed=failed)
+        logging.info(f"Run report saved to {args.report}")
 
 
 if __name__ == '__main__':
     main()
-else:
-    raise Exception("This file should be run as the main file.")
\ No newline at end of file
@@ -0,0 +1,291 @@
+import asyncio
+import math
+import random
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+
+from aiohttp import web
+from prawcore.exceptions import TooManyRequests
+
+from src.Benchmark.synthetic import generate_submissions
+
+# Reddit listings return at most this many items per request
+PAGE_SIZE = 100
+
+
+class FakeRateLimiter:
+    """Fixed-window request budget that mimics Reddit's rate-limit headers.
+
+    With ``block=False`` a request over budget raises ``prawcore.exceptions.TooManyRequests``
+    (carrying a retry-after header), like a 429 from Reddit; with ``block=True`` it
+    waits for the window to reset instead, like PRAW's own throttling.
+    """
+
+    def __init__(self, limit: Optional[int] = None, window: float = 600.0, block: bool = False):
+        self.limit = limit
+        self.window = window
+        self.block = block
+        self.used = 0
+        self.throttled = 0
+        self.reset_timestamp = time.time() + window
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.time()
+            if now >= self.reset_timestamp:
+                self.used = 0
+                self.reset_timestamp = now + self.window
+            if self.limit is not None and self.used >= self.limit:
+                self.throttled += 1
+                wait = self.reset_timestamp - now
+                if not self.block:
+                    raise TooManyRequests(SimpleNamespace(
+                        status_code=429, headers={'retry-after': f"{wait:.3f}"}, text="Too Many Requests"))
+                time.sleep(wait)
+                self.used = 0
+                self.reset_timestamp = time.time() + self.window
+            self.used += 1
+
+    @property
+    def remaining(self) -> Optional[float]:
+        return None if self.limit is None else float(self.limit - self.used)
+
+
+class FakeAuth:
+    def __init__(self, limiter: FakeRateLimiter):
+        self._limiter = limiter
+
+    @property
+    def limits(self) -> Dict:
+        # Same keys as praw's Reddit.auth.limits
+        return {
+            'remaining': self._limiter.remaining,
+            'reset_timestamp': self._limiter.reset_timestamp,
+            'used': self._limiter.used,
+        }
+
+
+class _Comments(list):
+    def replace_more(self, limit=0):
+        return []
+
+
+class FakeSubreddit:
+    def __init__(self, reddit: 'FakeReddit', name: str, submissions: List[SimpleNamespace]):
+        self._reddit = reddit
+        self.display_name = name
+        self.submissions = submissions
+
+    def _listing(self, ordered: List[SimpleNamespace], limit: Optional[int],
+                 params: Optional[Dict] = None) -> Iterator[SimpleNamespace]:
+        # Lazy like a PRAW ListingGenerator: one request per page, only when the page is reached
+        after = (params or {}).get('after')
+        if after:
+            ids = [s.id for s in ordered]
+            ordered = ordered[ids.index(after[3:]) + 1:] if after[3:] in ids else []
+        ordered = ordered if limit is None else ordered[:limit]
+        for start in range(0, len(ordered), PAGE_SIZE):
+            self._reddit._request()
+            yield from ordered[start:start + PAGE_SIZE]
+
+    def ordered(self, sort_method: str) -> List[SimpleNamespace]:
+        if sort_method in ('top', 'hot'):
+            return sorted(self.submissions, key=lambda s: -s.score)
+        if sort_method == 'controversial':
+            return sorted(self.submissions, key=lambda s: (s.score % 7, s.id))
+        if sort_method == 'new':
+            return sorted(self.submissions, key=lambda s: -s.created_utc)
+        raise ValueError(f"Unknown sort method: {sort_method}")
+
+    def top(self, time_filter: str = 'all', limit: Optional[int] = PAGE_SIZE):
+        return self._listing(self.ordered('top'), limit)
+
+    def hot(self, limit: Optional[int] = PAGE_SIZE):
+        return self._listing(self.ordered('hot'), limit)
+
+    def controversial(self, time_filter: str = 'all', limit: Optional[int] = PAGE_SIZE):
+        return self._listing(self.ordered('controversial'), limit)
+
+    def new(self, limit: Optional[int] = PAGE_SIZE, params: Optional[Dict] = None):
+        return self._listing(self.ordered('new'), limit, params)
+
+
+class FakeReddit:
+    """Offline stand-in for ``praw.Reddit`` covering what ``RedditScraper`` calls.
+
+    Every subreddit gets ``posts_per_subreddit`` synthetic posts (deterministic per
+    name). Each request sleeps ``latency`` seconds (plus up to ``jitter``) and is
+    charged against an optional ``rate_limit`` per ``rate_window`` seconds, so
+    scraper throughput and rate-limit handling can be measured without credentials.
+    """
+
+    def __init__(self, posts_per_subreddit: int = 1000, latency: float = 0.0, jitter: float = 0.0,
+                 rate_limit: Optional[int] = None, rate_window: float = 600.0, block_on_limit: bool = False,
+                 comments_per_post: int = 5, seed: int = 0, now: Optional[float] = None):
+        self.posts_per_subreddit = posts_per_subreddit
+        self.latency = latency
+        self.jitter = jitter
+        self.comments_per_post = comments_per_post
+        self.seed = seed
+        # Post timestamps are relative to this; pin it to get identical data from two fakes
+        self.now = time.time() if now is None else now
+        self.limiter = FakeRateLimiter(rate_limit, rate_window, block_on_limit)
+        self.auth = FakeAuth(self.limiter)
+        self.requests = 0
+        self._subreddits: Dict[str, FakeSubreddit] = {}
+        self._by_id: Dict[str, SimpleNamespace] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def _request(self) -> None:
+        self.limiter.acquire()
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def subreddit(self, name: str) -> FakeSubreddit:
+        with self._lock:
+            subreddit = self._subreddits.get(name)
+            if subreddit is None:
+                submissions = generate_submissions(self.posts_per_subreddit, seed=self.seed ^ zlib.crc32(name.encode()),
+                                                   comments_per_post=self.comments_per_post, prefix=f"{name}_",
+                                                   now=self.now)
+                self._by_id.update((s.id, s) for s in submissions)
+                subreddit = self._subreddits[name] = FakeSubreddit(self, name, submissions)
+        return subreddit
+
+    def submission(self, id: str) -> SimpleNamespace:
+        self._request()
+        source = self._by_id[id]
+        # Comments come back in 'top' order, which is the only sort the scraper asks for
+        return SimpleNamespace(id=id, comment_sort='top', comment_limit=None,
+                               comments=_Comments(sorted(source.comments, key=lambda c: -c.score)))
+
+    def info(self, fullnames: List[str]) -> Iterator[SimpleNamespace]:
+        for start in range(0, len(fullnames), PAGE_SIZE):
+            self._request()
+            for fullname in fullnames[start:start + PAGE_SIZE]:
+                submission = self._by_id.get(fullname[3:])
+                if submission is not None:
+                    yield submission
+
+
+def _thing(kind: str, data: Dict) -> Dict:
+    return {'kind': kind, 'data': data}
+
+
+def _listing_json(children: List[Dict], after: Optional[str] = None) -> Dict:
+    return {'kind': 'Listing', 'data': {'after': after, 'children': children}}
+
+
+def _submission_json(s: SimpleNamespace) -> Dict:
+    return _thing('t3', {
+        'id': s.id, 'name': f"t3_{s.id}", 'title': s.title, 'author': s.author, 'created_utc': s.created_utc,
+        'score': s.score, 'num_comments': s.num_comments, 'total_awards_received': s.total_awards_received,
+        'selftext': s.selftext, 'url': s.url, 'link_flair_text': s.link_flair_text, 'permalink': s.permalink,
+    })
+
+
+class FakeRedditServer:
+    """Local HTTP stand-in for the Reddit OAuth API, serving a ``FakeReddit``'s posts.
+
+    Covers the token endpoint, subreddit listings (with ``limit``/``after``
+    paging) and comment trees. Latency is awaited rather than slept, and
+    requests over the rate limit get a 429 with ``retry-after``; every response
+    carries Reddit's ``x-ratelimit-*`` headers. Use as
+    ``async with FakeRedditServer(reddit) as base_url``.
+    """
+
+    def __init__(self, reddit: Optional[FakeReddit] = None, host: str = "127.0.0.1", port: int = 0):
+        self.reddit = reddit or FakeReddit()
+        self.host = host
+        self.port = port
+        self.base_url: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    def _limit_headers(self) -> Dict[str, str]:
+        limiter = self.reddit.limiter
+        remaining = limiter.remaining
+        return {
+            'x-ratelimit-used': str(limiter.used),
+            'x-ratelimit-remaining': f"{remaining if remaining is not None else 1000.0:.1f}",
+            # Whole seconds like Reddit's; rounded up so a client never sees the window as over early
+            'x-ratelimit-reset': str(max(math.ceil(limiter.reset_timestamp - time.time()), 0)),
+        }
+
+    async def _charge(self) -> Optional[web.Response]:
+        """Apply latency and the rate limit to a request; a 429 response when over budget"""
+        reddit = self.reddit
+        try:
+            reddit.limiter.acquire()
+        except TooManyRequests as e:
+            return web.json_response({'message': 'Too Many Requests', 'error': 429}, status=429,
+                                     headers={'retry-after': e.retry_after, **self._limit_headers()})
+        with reddit._lock:
+            reddit.requests += 1
+            delay = reddit.latency + (reddit._random.random() * reddit.jitter if reddit.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        return None
+
+    async def _token(self, request: web.Request) -> web.Response:
+        return web.json_response({'access_token': 'fake-token', 'token_type': 'bearer',
+                                  'expires_in': 86400, 'scope': '*'})
+
+    async def _subreddit_listing(self, request: web.Request) -> web.Response:
+        throttled = await self._charge()
+        if throttled is not None:
+            return throttled
+        subreddit = self.reddit.subreddit(request.match_info['name'])
+        try:
+            ordered = subreddit.ordered(request.match_info['sort'])
+        except ValueError:
+            raise web.HTTPNotFound()
+        limit = min(int(request.query.get('limit', PAGE_SIZE)), PAGE_SIZE)
+        after = request.query.get('after')
+        start = 0
+        if after:
+            ids = [s.id for s in ordered]
+            start = ids.index(after[3:]) + 1 if after[3:] in ids else len(ordered)
+        page = ordered[start:start + limit]
+        next_after = f"t3_{page[-1].id}" if page and start + limit < len(ordered) else None
+        return web.json_response(_listing_json([_submission_json(s) for s in page], next_after),
+                                 headers=self._limit_headers())
+
+    async def _comments(self, request: web.Request) -> web.Response:
+        throttled = await self._charge()
+        if throttled is not None:
+            return throttled
+        submission = self.reddit._by_id.get(request.match_info['id'])
+        if submission is None:
+            raise web.HTTPNotFound()
+        limit = int(request.query.get('limit', 200))
+        comments = [_thing('t1', {'author': c.author, 'body': c.body, 'score': c.score,
+                                  'created_utc': c.created_utc})
+                    for c in sorted(submission.comments, key=lambda c: -c.score)[:limit]]
+        return web.json_response([_listing_json([_submission_json(submission)]), _listing_json(comments)],
+                                 headers=self._limit_headers())
+
+    async def __aenter__(self) -> str:
+        app = web.Application()
+        app.add_routes([
+            web.post('/api/v1/access_token', self._token),
+            web.get('/r/{name}/{sort}', self._subreddit_listing),
+            web.get('/comments/{id}', self._comments),
+        ])
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{self.host}:{port}"
+        return self.base_url
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._runner.cleanup()
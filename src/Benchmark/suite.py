@@ -0,0 +1,272 @@
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.Benchmark.synthetic import generate_posts, write_raw_jsonl
+
+DEFAULT_RESULTS_DIR = "data/benchmarks"
+DEFAULT_SCALES = (1000,)
+# A median this much slower than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # setup(scale, workdir, **options) -> (function to time, items it processes per call)
+    setup: Callable[..., Tuple[Callable[[], object], int]]
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup)
+        return setup
+    return register
+
+
+def _texts(scale: int) -> List[str]:
+    texts = []
+    for post in generate_posts(scale, seed=1):
+        texts.append(post.title)
+        texts.append(post.body)
+        texts.extend(c.body for c in post.comments)
+    return texts
+
+
+@benchmark("clean_text")
+def _bench_clean_text(scale, workdir, **options):
+    from src.Preprocessing.preprocessor import clean_text, clean_texts
+    texts = _texts(scale)
+    # The batch path must give exactly clean_text's output; checked once, outside the timing
+    if clean_texts(texts) != [clean_text(text) for text in texts]:
+        raise AssertionError("clean_texts differs from clean_text")
+    return (lambda: clean_texts(texts)), len(texts)
+
+
+@benchmark("block_bucketing")
+def _bench_block_bucketing(scale, workdir, **options):
+    from src.Preprocessing.preprocessor import assign_day_blocks, to_utc_datetimes
+    created_utc = [post.created_utc for post in generate_posts(scale, seed=2)]
+    return (lambda: assign_day_blocks(to_utc_datetimes(created_utc))), len(created_utc)
+
+
+@benchmark("sentiment")
+def _bench_sentiment(scale, workdir, **options):
+    from src.EDA.sentiment import get_analyzer, score_texts
+    from src.Preprocessing.preprocessor import clean_text, join_cleaned
+    texts = [join_cleaned(clean_text(p.title), clean_text(p.body)) for p in generate_posts(scale, seed=3)]
+    get_analyzer()  # Lexicon loading is a one-off cost, not part of scoring
+    return (lambda: score_texts(texts)), len(texts)
+
+
+@benchmark("ngrams")
+def _bench_ngrams(scale, workdir, **options):
+    from src.EDA.ngrams import NGramCounter
+    from src.EDA.stopwords import ENGLISH_STOP_WORDS
+    from src.Preprocessing.preprocessor import clean_text, join_cleaned
+    texts = [join_cleaned(clean_text(p.title), clean_text(p.body)) for p in generate_posts(scale, seed=4)]
+
+    def run():
+        counter = NGramCounter(n_values=(1, 2, 3), stop_words=ENGLISH_STOP_WORDS)
+        for t in texts:
+            counter.add_text(t)
+        return counter.most_common(1, 20)
+    return run, len(texts)
+
+
+@benchmark("preprocess")
+def _bench_preprocess(scale, workdir, **options):
+    from src.Preprocessing.preprocessor import create_preprocessed_json_by_blocks_of_days
+    raw_path = write_raw_jsonl(os.path.join(workdir, "data/raw/bench_preprocess.jsonl"), scale, seed=5)
+    return (lambda: create_preprocessed_json_by_blocks_of_days(raw_path)), scale
+
+
+@benchmark("complete_analysis")
+def _bench_complete_analysis(scale, workdir, **options):
+    from src.EDA.analysis import CompleteAnalysis
+    from src.Preprocessing.preprocessor import create_preprocessed_json_by_blocks_of_days
+    raw_path = write_raw_jsonl(os.path.join(workdir, "data/raw/bench_analysis.jsonl"), scale, seed=6)
+    processed_path = create_preprocessed_json_by_blocks_of_days(raw_path)
+    # No sentiment cache and no plots, so every round does the same work
+    return (lambda: CompleteAnalysis(processed_path, cache_path=None, plots=False)), scale
+
+
+@benchmark("scrape")
+def _bench_scrape(scale, workdir, latency=0.0, rate_limit=None, **options):
+    from src.Benchmark.fake_reddit import FakeReddit
+    from src.Scraping.RedditScraper import RedditScraper
+
+    def run():
+        scraper = RedditScraper("bench", "bench", "benchmark", get_comments=True)
+        scraper.reddit = FakeReddit(posts_per_subreddit=scale, latency=latency, rate_limit=rate_limit,
+                                    block_on_limit=True, comments_per_post=3)
+        posts, _ = scraper.collect_posts("bench", scale // 2)
+        return posts
+    return run, scale
+
+
+@benchmark("scrape_async")
+def _bench_scrape_async(scale, workdir, latency=0.0, rate_limit=None, **options):
+    import asyncio
+    from src.Benchmark.fake_reddit import FakeReddit, FakeRedditServer
+    from src.Scraping.AsyncRedditScraper import AsyncRedditScraper
+
+    async def collect():
+        reddit = FakeReddit(posts_per_subreddit=scale, latency=latency, rate_limit=rate_limit, comments_per_post=3)
+        async with FakeRedditServer(reddit) as base_url:
+            scraper = AsyncRedditScraper("bench", "bench", "benchmark", get_comments=True, base_url=base_url,
+                                         auth_url=f"{base_url}/api/v1/access_token")
+            posts, _ = await scraper.collect_posts("bench", scale // 2)
+            return posts
+    return (lambda: asyncio.run(collect())), scale
+
+
+def measure(func: Callable[[], object], rounds: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """Time ``func`` like pytest-benchmark's pedantic mode: warmup calls, then ``rounds`` timed calls"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(rounds):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'rounds': rounds,
+        'min': min(timings),
+        'max': max(timings),
+        'mean': statistics.mean(timings),
+        'median': statistics.median(timings),
+        'stddev': statistics.stdev(timings) if rounds > 1 else 0.0,
+    }
+
+
+def git_commit() -> str:
+    """Short hash of the checked-out commit, suffixed with -dirty for uncommitted changes"""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True, cwd=repo).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True, cwd=repo).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+@contextmanager
+def _working_directory(path: str):
+    # Pipeline stages write to data/... relative to the working directory
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def run_suite(names: List[str], scales=DEFAULT_SCALES, rounds: int = 5, warmup: int = 1,
+              **options) -> Dict:
+    """Run every benchmark at every scale in a scratch working directory.
+
+    ``options`` (e.g. the fake Reddit's ``latency`` and ``rate_limit``) are passed
+    to each benchmark's setup.
+    """
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'benchmarks': {},
+    }
+    for scale in scales:
+        for name in names:
+            with tempfile.TemporaryDirectory(prefix="bench-") as workdir, _working_directory(workdir):
+                func, items = BENCHMARKS[name].setup(scale, workdir, **options)
+                stats = measure(func, rounds, warmup)
+            stats['items'] = items
+            stats['items_per_s'] = items / stats['median'] if stats['median'] else None
+            results['benchmarks'][f"{name}[{scale}]"] = stats
+            print(f"{name}[{scale}]: median {stats['median']:.4f}s "
+                  f"({stats['items_per_s'] or 0:,.0f} items/s over {rounds} rounds)")
+    return results
+
+
+def save_results(results: Dict, results_dir: str = DEFAULT_RESULTS_DIR) -> str:
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{results['commit']}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def latest_results(results_dir: str = DEFAULT_RESULTS_DIR, exclude: Optional[str] = None) -> Optional[str]:
+    paths = [p for p in glob.glob(os.path.join(results_dir, "*.json")) if p != exclude]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Print median changes against ``baseline`` and return the benchmarks that regressed"""
+    regressions = []
+    print(f"Compared with {baseline['commit']} ({baseline['timestamp']}):")
+    for key, stats in current['benchmarks'].items():
+        before = baseline['benchmarks'].get(key)
+        if before is None:
+            print(f"  {key}: new")
+            continue
+        change = stats['median'] / before['median'] - 1 if before['median'] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"  {key}: {before['median']:.4f}s -> {stats['median']:.4f}s ({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks on synthetic data and a fake Reddit backend.")
+    parser.add_argument("benchmarks", nargs="*", metavar="BENCHMARK",
+                        help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)}).")
+    parser.add_argument("--scale", type=int, nargs="+", default=list(DEFAULT_SCALES),
+                        help="Number of synthetic posts, e.g. --scale 1000 100000 1000000.")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Per-request latency of the fake Reddit (s).")
+    parser.add_argument("--rate-limit", type=int, default=None,
+                        help="Requests per 10-minute window the fake Reddit allows before throttling.")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--baseline", help="Results file to compare with (default: the most recent other run).")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+    unknown = sorted(set(args.benchmarks) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results_dir = os.path.abspath(args.results_dir)
+    results = run_suite(args.benchmarks or list(BENCHMARKS), args.scale, args.rounds, args.warmup,
+                        latency=args.latency, rate_limit=args.rate_limit)
+    path = save_results(results, results_dir)
+    print(f"Results saved to {path}")
+
+    baseline_path = args.baseline or latest_results(results_dir, exclude=path)
+    if baseline_path:
+        with open(baseline_path) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+
+
+if __name__ == '__main__':
+    main()
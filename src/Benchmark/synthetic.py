@@ -0,0 +1,108 @@
+import json
+import os
+import random
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Iterator, List, Optional
+
+from src.Pipeline.records import RawComment, RawPost
+
+# Small vocabulary with sentiment words, stopwords and product terms, so cleaning,
+# stopword filtering, n-grams and VADER all see realistic work
+WORDS = (
+    "good bad great terrible love hate amazing awful happy disappointed best worst "
+    "the a an is are was not very really just this that it to of and for with on "
+    "gpu cpu price launch driver drivers buy sell stock card chip release update "
+    "performance benchmark frame rate power temps cooler review issue fixed broken"
+).split()
+PUNCTUATION = ["!", "?", ".", ",", "...", ":)", "!!", "—", "'s"]
+EMOJI = ["🚀", "🔥", "😡", "👍"]
+FLAIRS = [None, "News", "Discussion", "Rumor", "Tech Support", "Review"]
+
+
+def _sentence(rnd: random.Random, words: int) -> str:
+    parts = []
+    for _ in range(words):
+        word = rnd.choice(WORDS)
+        roll = rnd.random()
+        if roll < 0.1:
+            word += rnd.choice(PUNCTUATION)
+        elif roll < 0.12:
+            word += " " + rnd.choice(EMOJI)
+        elif roll < 0.13:
+            word = f"https://example.com/{rnd.randrange(10000)}"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def generate_posts(n: int, seed: int = 0, days: int = 30, comments_per_post: int = 3,
+                   now: Optional[float] = None, prefix: str = "p") -> Iterator[RawPost]:
+    """Yield ``n`` posts as ``RedditScraper._transform_post`` builds them (comments filled in).
+
+    Posts are spread uniformly over the last ``days`` days and generated lazily,
+    so a million of them never have to be in memory at once.
+    """
+    rnd = random.Random(seed)
+    now = int(time.time() if now is None else now)
+    for i in range(n):
+        created = now - rnd.randrange(days * 86400)
+        post_id = f"{prefix}{i:x}"
+        yield RawPost(
+            title=_sentence(rnd, rnd.randint(4, 12)).capitalize(),
+            author=f"user{rnd.randrange(5000)}",
+            created_utc=datetime.fromtimestamp(created, tz=timezone.utc).isoformat(),
+            score=int(rnd.paretovariate(1.2)) - 1,
+            num_comments=rnd.randrange(200),
+            awards=0,
+            # Roughly one post in six is a link post with no body, which preprocessing skips
+            body="" if rnd.random() < 0.15 else _sentence(rnd, rnd.randint(10, 120)),
+            url=f"https://example.com/{post_id}",
+            flair=rnd.choice(FLAIRS),
+            post_id=post_id,
+            permalink=f"https://www.reddit.com/r/synthetic/comments/{post_id}/",
+            comments=[RawComment(
+                author=f"user{rnd.randrange(5000)}",
+                body=_sentence(rnd, rnd.randint(3, 40)),
+                score=rnd.randrange(500),
+                created_utc=datetime.utcfromtimestamp(created + rnd.randrange(3600)).isoformat() + 'Z',
+            ) for _ in range(comments_per_post)],
+        )
+
+
+def write_raw_jsonl(path: str, n: int, seed: int = 0, **kwargs) -> str:
+    """Stream ``n`` synthetic posts to a raw JSONL file laid out like the scraper's output"""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for post in generate_posts(n, seed=seed, **kwargs):
+            f.write(json.dumps(post.to_json(), ensure_ascii=False) + "\n")
+    return path
+
+
+def to_submission(post: RawPost) -> SimpleNamespace:
+    """PRAW-Submission-like object that ``_transform_post`` turns back into ``post``"""
+    permalink = post.permalink[len("https://www.reddit.com"):]
+    return SimpleNamespace(
+        id=post.post_id,
+        title=post.title,
+        author=post.author,
+        created_utc=datetime.fromisoformat(post.created_utc).timestamp(),
+        score=post.score,
+        num_comments=post.num_comments,
+        total_awards_received=post.awards,
+        selftext=post.body,
+        url=post.url,
+        link_flair_text=post.flair,
+        permalink=permalink,
+        comments=[SimpleNamespace(
+            author=c.author,
+            body=c.body,
+            score=c.score,
+            created_utc=datetime.fromisoformat(c.created_utc[:-1]).replace(tzinfo=timezone.utc).timestamp(),
+        ) for c in post.comments],
+    )
+
+
+def generate_submissions(n: int, seed: int = 0, **kwargs) -> List[SimpleNamespace]:
+    return [to_submission(post) for post in generate_posts(n, seed=seed, **kwargs)]
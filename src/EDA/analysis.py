@@ -1,17 +1,19 @@
-
+import logging
 import numpy as np
 import pandas as pd
-import nltk as nlt
 import json
-import seaborn as sns
-import matplotlib.pyplot as plt
 import os
-import json
-from collections import Counter
-import re
-from nltk.corpus import stopwords
-from nltk.util import ngrams
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from typing import NamedTuple
+from src.EDA.stopwords import ENGLISH_STOP_WORDS
+from src.Preprocessing.preprocessor import load_processed
+from src.EDA.sentiment import DEFAULT_CACHE_PATH, SentimentCache, score_batch, score_comments
+from src.EDA.backends import get_backend
+from src.EDA.ngrams import NGramCounter
+from src.EDA.block_cache import BLOCK_CACHE_FILENAME, BlockCache
+from src.EDA.dedup import DEFAULT_DEDUP_PATH, DuplicateIndex, drop_near_duplicates
+from src.Pipeline import instrumentation
+
+logger = logging.getLogger(__name__)
 
 
 
@@ -21,33 +23,59 @@ def get_filename(path):
     return os.path.splitext(os.path.basename(path))[0]
 
 
+# Processed columns the analysis reads
+ANALYSIS_COLUMNS = ['post_id', 'date', 'time', 'score', 'num_comments', 'flair', 'combined_text', 'comments', 'block_index']
 
-def CompleteAnalysis(file_path):
 
-    filepathbase=f"data/PostEDA/{get_filename(file_path)}/"
-        # Ensure the folder exists
-    if not os.path.exists(filepathbase):
-        os.makedirs(filepathbase)
+class AnalysisResult(NamedTuple):
+    company: str
+    df: pd.DataFrame              # One row per post with all derived columns
+    daily_scores: pd.DataFrame    # day, score, rolling_score
+    common_words: pd.DataFrame    # Word, Frequency (top 20, stopwords removed)
+    grams: dict                   # Top 20 bigrams / trigrams
+    correlations: pd.DataFrame
+    export: pd.DataFrame          # One row per block, written to Export.json
 
-    with open(file_path, "r", encoding="utf-8") as file:
-        json_data = json.load(file)
 
-    # Add block index to each post
-    processed = []
-    for block_index, block in enumerate(json_data):
-        for post in block:
-            post['block_index'] = block_index  # You can also add a date range or tag
-            processed.append(post)
+def block_rows(df):
+    # Export.json rows (one per block_index) for a frame with Sentiment columns
+    grouped = df.groupby('block_index')
 
-    # Create DataFrame
-    df = pd.DataFrame(processed)
+    rows = pd.DataFrame(index=grouped.size().index)
+    rows['date'] = grouped['date'].first()        # Date of first post in the block
+    rows['avg_sentiment'] = grouped['Sentiment'].mean()
+    rows['avg_comment_sentiment'] = grouped['Comment_Sentiment'].mean()
+    rows['num_comments'] = grouped['num_comments'].sum()
+    rows['num_posts'] = grouped.size()             # Number of rows in each group
+    return rows
 
-    # Optional: Create datetime column
-    df["datetime"] = pd.to_datetime(df["date"] + " " + df["time"])
 
-    # Now you can group by 'block_index' to get back the structure
-    df.head()
+def compute_analysis(file_path, backend='vader', jobs=1, cache_path=DEFAULT_CACHE_PATH, ngram_capacity=None,
+                     block_cache_path=None, dedup_path=None):
+    # Headless part of CompleteAnalysis: every metric and aggregate, no plotting.
+    # ngram_capacity bounds n-gram memory with a Space-Saving sketch (exact counts when None).
+    # block_cache_path enables the per-block cache: blocks whose posts are unchanged since
+    # the last run reuse their stored sentiment, n-gram counts and Export.json row.
+    # dedup_path enables the near-duplicate index: reposts and copy-pasted posts are
+    # dropped before any stage, so they are neither scored, counted nor averaged.
+
+    sections = instrumentation.laps(get_filename(file_path))
+
+    # One row per post with block_index; columnar files load only these columns
+    df = load_processed(file_path, columns=ANALYSIS_COLUMNS)
+    sections.lap('analysis.load', len(df))
+
+    if dedup_path:
+        with DuplicateIndex(dedup_path, namespace=get_filename(file_path)) as index:
+            oldest = df['date'].min() if len(df) else None
+            df = drop_near_duplicates(df, index)
+            if oldest is not None:
+                # The processed file spans the whole data window; older entries have expired
+                index.prune(oldest)
+        sections.lap('analysis.dedup', len(df))
 
+    # Optional: Create datetime column
+    df["datetime"] = pd.to_datetime(df["date"] + " " + df["time"])
 
 
     # # Sentiment over time
@@ -60,29 +88,13 @@ def CompleteAnalysis(file_path):
     # Rename columns for clarity
     daily_scores.columns = ['day', 'score']
 
-
-
     daily_scores['rolling_score'] = daily_scores['score'].rolling(window=3).mean()
 
-    plt.figure(figsize=(12, 6))
-    plt.plot(daily_scores['day'], daily_scores['score'], alpha=0.4, label='Daily Score')
-    plt.plot(daily_scores['day'], daily_scores['rolling_score'], color='red', label='3-Day Rolling Avg')
-    plt.title("Reddit Post Scores with Rolling Average")
-    plt.xlabel("Date")
-    plt.ylabel("Score")
-    plt.legend()
-    plt.grid(False)
-    plt.xticks(rotation=0)
-    plt.tight_layout()
-    plt.savefig(f'{filepathbase}RollingScore.png')
-
 
     # # Text Based Analysis
 
     text = df["combined_text"]
 
-    
-
     # Total character counts per post
     character_count = list(map(lambda x:len(x),text))
 
@@ -91,55 +103,80 @@ def CompleteAnalysis(file_path):
     # Total word count per post
     word_counts = list(map(lambda s: len(s.split()), text))
     df["Word_count"] = word_counts
-
-    # Seperated Words from total list
-    words = [word.lower() for t in text for word in re.findall(r'\b\w+\b', t)]
-    # df["Sepeated_words"] = words
-
-    # Sepeated words PER list
-    words_per_list = []
-    for t in text:
-        words_per_list.append([text.lower() for text in re.findall(r'\b\w+\b', t)])
-
-    df["Seperated_List"] = words_per_list
-
-    # Frequncy of words in the entire dataframe
-    word_freq_counts = Counter(words)
-
-    # nlt.download('stopwords',download_dir="/src/EDA")
-    df.head()
-
-    
-    stop_words = set(stopwords.words('english'))  # Load English stopwords
-    words = [w for w in words if w not in stop_words]
-    word_freq_counts = Counter(words)
-    most_common = word_freq_counts.most_common(20)  
+    sections.lap('analysis.text_stats', len(df))
+
+    stop_words = ENGLISH_STOP_WORDS  # Frozen NLTK English stopwords, no corpus needed
+
+    scorer = get_backend(backend)
+
+    # Split blocks into ones served from the block cache and ones to compute
+    block_cache = BlockCache(block_cache_path, scorer.name) if block_cache_path and scorer.cacheable else None
+    block_keys = {}
+    cached_blocks = {}
+    if block_cache is not None:
+        for block_index, block in df.groupby('block_index', sort=True):
+            block_keys[block_index] = block_cache.key(block)
+            entry = block_cache.get(block_keys[block_index])
+            if entry is not None:
+                cached_blocks[block_index] = entry
+        logger.info("Block cache: %d of %d blocks unchanged", len(cached_blocks), len(block_keys))
+    fresh = ~df['block_index'].isin(list(cached_blocks))
+    fresh_df = df[fresh]
+    sections.lap('analysis.block_cache', len(block_keys))
+
+    # One tokenization pass per document; unigrams, bigrams and trigrams are
+    # counted within each document (stopwords removed) straight into counters
+    if block_cache is None:
+        ngram_counter = NGramCounter(n_values=(1, 2, 3), stop_words=stop_words, capacity=ngram_capacity)
+        for t in text:
+            ngram_counter.add_text(t)
+        fresh_block_grams = {}
+    else:
+        # Exact counts per block, merged in block order so cached and fresh blocks
+        # add up to the same totals (and tie order) as a full recount
+        ngram_counter = NGramCounter(n_values=(1, 2, 3), stop_words=stop_words)
+        fresh_block_grams = {}
+        for block_index in block_keys:
+            if block_index in cached_blocks:
+                ngram_counter.merge(NGramCounter.counts_from_json(cached_blocks[block_index]['ngrams']))
+                continue
+            block_counter = NGramCounter(n_values=(1, 2, 3), stop_words=stop_words)
+            for t in fresh_df.loc[fresh_df['block_index'] == block_index, 'combined_text']:
+                block_counter.add_text(t)
+            ngram_counter.merge(block_counter.counters)
+            fresh_block_grams[block_index] = block_counter.to_json()
+
+    most_common = ngram_counter.most_common(1, 20)
 
     common_words_df = pd.DataFrame(most_common, columns=['Word', 'Frequency'])
-    common_words_df.head()
-
-    
-
-    # Generate unigrams, bigrams, trigrams
-    unigrams = list(ngrams(words, 1))
-    bigrams = list(ngrams(words, 2))
-    trigrams = list(ngrams(words, 3))
 
     # Count most common n-grams
-
-    grams_df = pd.DataFrame()
-    grams_df["bigrams"] = Counter(bigrams).most_common(20)
-    grams_df["trigrams"] = Counter(trigrams).most_common(20)
-    grams_df.head()
-
-
-    
-    sia = SentimentIntensityAnalyzer()
-
-    sent = df['combined_text'].apply(lambda post: sia.polarity_scores(post)['compound'])
-    df["Sentiment"] = sent
-
-    df.head()
+    grams = {
+        'bigrams': ngram_counter.most_common(2, 20),
+        'trigrams': ngram_counter.most_common(3, 20),
+    }
+    sections.lap('analysis.ngrams', len(fresh_df) if block_cache is not None else len(df))
+
+
+    # Scores come from the selected backend (VADER by default); unchanged texts are served from the cache
+    df["Sentiment"] = np.nan
+    df["Comment_Sentiment"] = np.nan
+    if not fresh_df.empty:
+        scorer.prepare(fresh_df['combined_text'].tolist())
+        cache = SentimentCache(cache_path, namespace=scorer.name) if cache_path and scorer.cacheable else None
+        try:
+            df.loc[fresh, "Sentiment"] = score_batch(fresh_df['combined_text'], jobs=jobs, cache=cache,
+                                                     scorer=scorer.score)
+            df.loc[fresh, "Comment_Sentiment"] = score_comments(fresh_df['comments'], jobs=jobs, cache=cache,
+                                                                scorer=scorer.score)
+        finally:
+            if cache is not None:
+                cache.close()
+    for block_index, entry in cached_blocks.items():
+        in_block = df['block_index'] == block_index
+        df.loc[in_block, "Sentiment"] = entry['sentiment']
+        df.loc[in_block, "Comment_Sentiment"] = [np.nan if s is None else s for s in entry['comment_sentiment']]
+    sections.lap('analysis.sentiment', len(fresh_df))
 
 
     # Make sure these columns exist — adjust as needed
@@ -155,126 +192,75 @@ def CompleteAnalysis(file_path):
     # Compute popularity metric
     df['popularity'] = df['score'] + df['num_comments']
 
-    # --- Plot: Sentiment vs Post Length ---
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(data=df, x='post_length', y='Sentiment')
-    plt.title('Sentiment vs Post Length')
-    plt.xlabel('Post Length (characters)')
-    plt.ylabel('Sentiment')
-    plt.grid(False)
-    plt.tight_layout()
-    plt.savefig(f'{filepathbase}SentVlen.png')
-
-    # --- Plot: Sentiment vs Hour of Day ---
-    plt.figure(figsize=(10, 6))
-    sns.boxplot(data=df, x='hour', y='Sentiment')
-    plt.title('Sentiment vs Time of Day')
-    plt.xlabel('Hour')
-    plt.ylabel('Sentiment')
-    plt.grid(False)
-    plt.tight_layout()
-    plt.savefig(f'{filepathbase}SentVTime.png')
-
-    # --- Plot: Sentiment vs Popularity ---
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(data=df, x='popularity', y='Sentiment')
-    plt.title('Sentiment vs Popularity (Score + Comments)')
-    plt.xlabel('Popularity')
-    plt.ylabel('Sentiment')
-    plt.grid(False)
-    plt.tight_layout()
-    plt.savefig(f'{filepathbase}SentVPop.png')
-
     # --- Correlation Analysis ---
     correlations = df[['post_length', 'hour', 'popularity', 'Sentiment']].corr()
+    sections.lap('analysis.correlations', len(df))
 
 
-    relevant_columns = ['date', 'score', 'num_comments', 'flair','character_count','Word_count', 'Sentiment','post_length','hour', "popularity","block_index"]
+    relevant_columns = ['date', 'score', 'num_comments', 'flair','character_count','Word_count', 'Sentiment','Comment_Sentiment','post_length','hour', "popularity","block_index"]
     new_df = df[relevant_columns]
-    new_df.head()
-
-    sentiment_vs_date = new_df[['date', 'Sentiment']]
-
-    # Filter for year 2025
-    sentiment_vs_date_2025 = sentiment_vs_date[sentiment_vs_date['date'].dt.year == 2025]
-
-
-    
-
-    # Sort by date
-    sentiment_vs_date_2025 = sentiment_vs_date_2025.sort_values("date")
-
-    # Apply a 3-day rolling average for smoothing
-    sentiment_vs_date_2025['Smoothed Sentiment'] = sentiment_vs_date_2025['Sentiment'].rolling(window=3).mean()
-
-    # Set style
-    sns.set(style="whitegrid")
-
-    # Plot
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=sentiment_vs_date_2025, x='date', y='Smoothed Sentiment', marker='o', color='steelblue')
-    plt.title('Sentiment Trend Over Time (2025)', fontsize=16)
-    plt.xlabel('Date')
-    plt.ylabel('Average Sentiment (3-Day Rolling)')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig(f'{filepathbase}SentOverTime.png')
-
-
-    new_df.head()
-
-    new_df.head()
-
-
-    # Count how many posts are in each block
-    block_counts = df['block_index'].value_counts().sort_index()
-
-    # Plot
-    plt.figure(figsize=(8, 5))
-    sns.barplot(x=block_counts.index, y=block_counts.values, palette="viridis")
-    plt.title("Number of Posts per 3-Day Block (block_index)")
-    plt.xlabel("Block Index")
-    plt.ylabel("Number of Posts")
-    plt.tight_layout()
-    plt.grid(axis='y')
-    plt.savefig(f'{filepathbase}PostPerBlock.png')
-
-
-    grouped = new_df.groupby('block_index')
-    grouped.head()
-
-
-
-    stop_words = set(stopwords.words('english'))
 
+    # Per-block rows: freshly computed blocks plus the stored rows of cached ones
+    rows = block_rows(new_df[fresh])
+    if cached_blocks:
+        cached_rows = pd.DataFrame.from_dict({b: e['row'] for b, e in cached_blocks.items()}, orient='index')
+        cached_rows['date'] = pd.to_datetime(cached_rows['date'])
+        cached_rows['avg_comment_sentiment'] = cached_rows['avg_comment_sentiment'].astype(float)
+        rows = pd.concat([rows, cached_rows[rows.columns]]).sort_index()
+
+    if block_cache is not None:
+        for block_index, row in rows.loc[list(fresh_block_grams)].iterrows():
+            in_block = new_df['block_index'] == block_index
+            block_cache.put(block_keys[block_index], {
+                'row': {
+                    'date': row['date'].date().isoformat(),
+                    'avg_sentiment': float(row['avg_sentiment']),
+                    'avg_comment_sentiment': None if pd.isna(row['avg_comment_sentiment'])
+                    else float(row['avg_comment_sentiment']),
+                    'num_comments': int(row['num_comments']),
+                    'num_posts': int(row['num_posts']),
+                },
+                'sentiment': new_df.loc[in_block, 'Sentiment'].tolist(),
+                'comment_sentiment': [None if pd.isna(s) else s
+                                      for s in new_df.loc[in_block, 'Comment_Sentiment']],
+                'ngrams': fresh_block_grams[block_index],
+            })
+        block_cache.save()
 
     exportDF = pd.DataFrame()
-    exportDF['date'] = grouped['date'].first().values        # Date of first post in the block
+    exportDF['date'] = rows['date'].values
     exportDF['company'] = get_filename(file_path)
-    exportDF['avg_sentiment'] = grouped['Sentiment'].mean().values
-    exportDF['num_comments'] = grouped['num_comments'].sum().values
-    exportDF['num_posts'] = grouped.size().values             # Number of rows in each group
-
-
-    exportDF.head()
-
-    common_words_df.head()
-
-    # Define path
-    path = "data/PostEDA"
-    processed_dir = path
-    os.makedirs(processed_dir, exist_ok=True)
+    exportDF['avg_sentiment'] = rows['avg_sentiment'].values
+    exportDF['avg_comment_sentiment'] = rows['avg_comment_sentiment'].values
+    exportDF['num_comments'] = rows['num_comments'].astype(int).values
+    exportDF['num_posts'] = rows['num_posts'].astype(int).values
+    sections.lap('analysis.export', len(exportDF))
+
+    return AnalysisResult(
+        company=get_filename(file_path),
+        df=df,
+        daily_scores=daily_scores,
+        common_words=common_words_df,
+        grams=grams,
+        correlations=correlations,
+        export=exportDF,
+    )
+
+
+def write_outputs(result, filepathbase):
+    # Dump Export.json and Words.json for an AnalysisResult
+    os.makedirs(filepathbase, exist_ok=True)
 
     # Convert date columns to string (ISO format)
-    exportDF_serializable = exportDF.copy()
+    exportDF_serializable = result.export.copy()
     exportDF_serializable['date'] = exportDF_serializable['date'].astype(str)
+    # Blocks without scored comments have no comment sentiment; write null, not NaN
+    exportDF_serializable = exportDF_serializable.astype(object).where(exportDF_serializable.notna(), None)
 
-    common_words_serializable = common_words_df.copy()
+    common_words_serializable = result.common_words.copy()
     if 'date' in common_words_serializable.columns:
         common_words_serializable['date'] = common_words_serializable['date'].astype(str)
 
-
-
     # Dump exportDF
     with open(os.path.join(filepathbase, 'Export.json'), 'w') as f:
         json.dump(exportDF_serializable.to_dict(orient='records'), f, indent=2)
@@ -284,9 +270,41 @@ def CompleteAnalysis(file_path):
         json.dump(common_words_serializable.to_dict(orient='records'), f, indent=2)
 
 
+def CompleteAnalysis(file_path, backend='vader', jobs=1, cache_path=DEFAULT_CACHE_PATH, plots=True, plot_jobs=1,
+                     ngram_capacity=None, incremental=False, chunk_size=None, dedup=False):
+
+    filepathbase=f"data/PostEDA/{get_filename(file_path)}/"
+        # Ensure the folder exists
+    if not os.path.exists(filepathbase):
+        os.makedirs(filepathbase)
+
+    if chunk_size:
+        # Out-of-core mode: bounded memory, but no per-post frame to plot from
+        from src.EDA.streaming import compute_analysis_chunked
+        with instrumentation.stage('analysis.chunked', get_filename(file_path)) as span:
+            result = compute_analysis_chunked(file_path, chunk_size=chunk_size, backend=backend, jobs=jobs,
+                                              cache_path=cache_path, ngram_capacity=ngram_capacity,
+                                              dedup_path=DEFAULT_DEDUP_PATH if dedup else None)
+            span.items = int(result.export['num_posts'].sum())
+        if plots:
+            logger.info("Skipping plots for %s: not available in chunked mode", file_path)
+    else:
+        result = compute_analysis(file_path, backend=backend, jobs=jobs, cache_path=cache_path,
+                                  ngram_capacity=ngram_capacity,
+                                  dedup_path=DEFAULT_DEDUP_PATH if dedup else None,
+                                  block_cache_path=os.path.join(filepathbase, BLOCK_CACHE_FILENAME) if incremental else None)
+    with instrumentation.stage('analysis.write_outputs', result.company, items=len(result.export)):
+        write_outputs(result, filepathbase)
+
+    if plots and result.df is not None:
+        # Imported here so headless runs never load matplotlib/seaborn
+        from src.EDA.plots import render_plots
+        with instrumentation.stage('analysis.plots', result.company, items=len(result.df)):
+            render_plots(result, filepathbase, jobs=plot_jobs)
+
     return filepathbase
 
 
 
 if __name__ == '__main__':
-    CompleteAnalysis(file_path)
\ No newline at end of file
+    CompleteAnalysis(file_path)
@@ -0,0 +1,215 @@
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import pickle
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.EDA.sentiment import score_texts
+
+logger = logging.getLogger(__name__)
+
+# Where SklearnBackend looks for a model fitted ahead of time (python -m src.EDA.backends --fit-model)
+DEFAULT_MODEL_PATH = "data/models/sklearn.pkl"
+
+
+class SentimentBackend:
+    """A sentiment scorer that maps a batch of texts to scores in [-1, 1].
+
+    ``cacheable`` backends give the same score for the same text on every run, so
+    their results may be stored in the content-hash SentimentCache.
+    """
+    name = None
+    cacheable = True
+
+    def prepare(self, texts: List[str]) -> None:
+        """Hook run once on the full corpus before any (possibly parallel) scoring"""
+
+    def score(self, texts: List[str]) -> List[float]:
+        raise NotImplementedError
+
+
+class VaderBackend(SentimentBackend):
+    name = "vader"
+
+    def score(self, texts):
+        return score_texts(texts)
+
+
+class TextBlobBackend(SentimentBackend):
+    name = "textblob"
+
+    def score(self, texts):
+        from textblob import TextBlob
+        return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+class AfinnBackend(SentimentBackend):
+    name = "afinn"
+    # Same squashing VADER applies to its raw valence sum, so scores land in [-1, 1]
+    ALPHA = 15
+
+    def __init__(self):
+        self._afinn = None
+
+    def score(self, texts):
+        if self._afinn is None:
+            from afinn import Afinn
+            self._afinn = Afinn()
+        raw = (self._afinn.score(text) for text in texts)
+        return [s / math.sqrt(s * s + self.ALPHA) for s in raw]
+
+
+class SklearnBackend(SentimentBackend):
+    """Hashing vectorizer + linear model, scoring whole sparse matrices at once.
+
+    A model saved with ``save`` at ``model_path`` is loaded and used as is, so
+    scoring costs only the vectorizer and a sparse dot product. Without one the
+    backend distils VADER on the texts it is asked to score (positive/negative
+    VADER labels, neutral texts dropped): that first runs VADER over every text,
+    so it is slower than the VADER backend, and results depend on the corpus and
+    are never cached. Texts that do not hold both a positive and a negative
+    example leave nothing to learn; they score 0.0.
+    """
+    name = "sklearn"
+    cacheable = False
+
+    def __init__(self, n_features: int = 2 ** 18, model=None, model_path: Optional[str] = DEFAULT_MODEL_PATH):
+        if model is None and model_path and os.path.exists(model_path):
+            try:
+                with open(model_path, 'rb') as f:
+                    saved = pickle.load(f)
+                n_features, model = saved['n_features'], saved['model']
+                logger.info("sklearn backend: loaded model from %s", model_path)
+            except (OSError, pickle.UnpicklingError, KeyError, AttributeError, ImportError) as e:
+                logger.warning("sklearn backend: ignoring unreadable model %s: %s", model_path, e)
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.n_features = n_features
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                                            alternate_sign=False, norm='l2')
+        self.model = model
+        self._fitted = model is not None
+
+    def fit(self, texts: List[str], labels: Optional[List[int]] = None) -> "SklearnBackend":
+        from sklearn.linear_model import SGDClassifier
+        if labels is None:
+            vader = np.asarray(score_texts(texts))
+            keep = np.abs(vader) >= 0.05
+            texts = [text for text, k in zip(texts, keep) if k]
+            labels = (vader[keep] > 0).astype(int)
+        self._fitted = True
+        if len(set(np.asarray(labels).tolist())) < 2:
+            logger.warning("sklearn backend: %d training texts do not cover both classes, scoring 0.0", len(texts))
+            self.model = None
+            return self
+        self.model = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=0)
+        self.model.fit(self.vectorizer.transform(texts), labels)
+        return self
+
+    def save(self, path: str = DEFAULT_MODEL_PATH) -> None:
+        if self.model is None:
+            raise ValueError("sklearn backend has no fitted model to save")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump({'n_features': self.n_features, 'model': self.model}, f)
+
+    def prepare(self, texts):
+        if not self._fitted:
+            self.fit(texts)
+
+    def score(self, texts):
+        self.prepare(texts)
+        if self.model is None:
+            return [0.0] * len(texts)
+        probabilities = self.model.predict_proba(self.vectorizer.transform(texts))[:, 1]
+        return (probabilities * 2 - 1).tolist()
+
+
+BACKENDS = {backend.name: backend for backend in (VaderBackend, TextBlobBackend, AfinnBackend, SklearnBackend)}
+
+
+def get_backend(name: str, **kwargs) -> SentimentBackend:
+    try:
+        return BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown sentiment backend '{name}', expected one of {sorted(BACKENDS)}") from None
+
+
+def load_texts(file_path: str) -> List[str]:
+    # combined_text of every post in a processed file (any processed format)
+    from src.Preprocessing.preprocessor import load_processed
+    return load_processed(file_path, columns=['combined_text'])['combined_text'].tolist()
+
+
+def benchmark_backends(file_paths: List[str], names: Optional[List[str]] = None) -> List[Dict]:
+    """Throughput (docs/sec) and peak traced memory of each backend on processed files.
+
+    ``docs_per_sec`` includes ``fit_seconds`` (the sklearn backend distilling
+    VADER when it has no saved model), i.e. what a single run pays;
+    ``score_docs_per_sec`` is scoring alone, what a pre-fitted model costs.
+    """
+    texts = [text for path in file_paths for text in load_texts(path)]
+    results = []
+    for name in names or list(BACKENDS):
+        backend = get_backend(name)
+        start = time.perf_counter()
+        backend.prepare(texts)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        backend.score(texts)
+        seconds = time.perf_counter() - start
+
+        # Memory is traced on a second pass so tracing overhead does not skew timings
+        tracemalloc.start()
+        backend.score(texts)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            'backend': name,
+            'docs': len(texts),
+            'seconds': round(seconds, 4),
+            'fit_seconds': round(fit_seconds, 4),
+            'docs_per_sec': round(len(texts) / (fit_seconds + seconds), 1) if fit_seconds + seconds else float('inf'),
+            'score_docs_per_sec': round(len(texts) / seconds, 1) if seconds else float('inf'),
+            'peak_mb': round(peak / 2 ** 20, 2),
+        })
+        logger.info("%-8s %8d docs  %10.1f docs/s incl. %.2fs fit  (%10.1f docs/s scoring only)  %8.2f MB peak",
+                    name, len(texts), results[-1]['docs_per_sec'], fit_seconds,
+                    results[-1]['score_docs_per_sec'], results[-1]['peak_mb'])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentiment backends on processed files.")
+    parser.add_argument("files", nargs="*", default=sorted(glob.glob("data/processed/*.*")))
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=None)
+    parser.add_argument("--output", help="Write the results as JSON to this path.")
+    parser.add_argument("--fit-model", metavar="PATH", nargs="?", const=DEFAULT_MODEL_PATH,
+                        help=f"Instead of benchmarking, fit the sklearn backend on the files and save it "
+                             f"(default {DEFAULT_MODEL_PATH}, where --backend sklearn loads it from).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+    if args.fit_model:
+        texts = [text for path in args.files for text in load_texts(path)]
+        backend = SklearnBackend(model_path=None).fit(texts)
+        backend.save(args.fit_model)
+        logger.info("Fitted the sklearn backend on %d texts, saved to %s", len(texts), args.fit_model)
+        return
+    results = benchmark_backends(args.files, args.backends)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BLOCK_CACHE_FILENAME = "block_cache.json"
+# Bump when the cached entry layout or the way it is computed changes
+CACHE_VERSION = 1
+
+
+def block_key(block: pd.DataFrame, namespace: str) -> str:
+    """Hash of everything a block's results depend on: post ids, text, counters and comments"""
+    digest = hashlib.sha1(f"{CACHE_VERSION}\0{namespace}".encode('utf-8'))
+    for post_id, text, score, num_comments, comments in zip(
+            block['post_id'], block['combined_text'], block['score'], block['num_comments'], block['comments']):
+        digest.update(f"\0{post_id}\0{text}\0{score}\0{num_comments}".encode('utf-8'))
+        for comment in (comments if comments is not None else []):
+            digest.update(f"\0c{comment['comment_body']}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class BlockCache:
+    """Per-block analysis results stored next to a company's Export.json.
+
+    Entries are keyed by ``block_key`` so a block whose posts did not change is
+    never recomputed. ``save`` keeps only the entries used in the current run,
+    so blocks that dropped out of the data do not accumulate.
+    """
+
+    def __init__(self, path: str, namespace: str):
+        self.path = path
+        self.namespace = namespace
+        self.entries: Dict[str, Dict] = {}
+        self._used: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+                if stored.get('version') == CACHE_VERSION and stored.get('namespace') == namespace:
+                    self.entries = stored['blocks']
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Ignoring unreadable block cache %s: %s", path, e)
+
+    def key(self, block: pd.DataFrame) -> str:
+        return block_key(block, self.namespace)
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self._used[key] = entry
+        return entry
+
+    def put(self, key: str, entry: Dict) -> None:
+        self.entries[key] = entry
+        self._used[key] = entry
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'version': CACHE_VERSION, 'namespace': self.namespace, 'blocks': self._used}, f)
+        os.replace(tmp_path, self.path)
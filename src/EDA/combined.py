@@ -0,0 +1,128 @@
+import argparse
+import json
+import logging
+import os
+from collections import Counter
+from typing import Dict, List, NamedTuple
+
+import pandas as pd
+
+from src.EDA.backends import BACKENDS, get_backend
+from src.EDA.ngrams import NGramCounter
+from src.EDA.sentiment import DEFAULT_CACHE_PATH, SentimentCache, score_batch, score_comments
+from src.EDA.stopwords import ENGLISH_STOP_WORDS
+from src.Preprocessing.preprocessor import get_filename, load_processed
+
+logger = logging.getLogger(__name__)
+
+COMBINED_DIR = "data/PostEDA/combined/"
+COMBINED_COLUMNS = ['date', 'num_comments', 'combined_text', 'comments']
+
+
+class CombinedReport(NamedTuple):
+    companies: List[str]
+    daily: pd.DataFrame           # date, company, avg_sentiment, avg_comment_sentiment, num_comments, num_posts
+    correlations: pd.DataFrame    # company x company correlation of daily avg_sentiment
+    shared_grams: Dict[str, list] # Top n-grams used by every company, with per-company counts
+
+
+def shared_most_common(counters: Dict[str, Counter], k: int = 20) -> List[Dict]:
+    """Top ``k`` items present in every counter, ranked by their combined count"""
+    common = set.intersection(*(set(c) for c in counters.values())) if counters else set()
+    ranked = sorted(common, key=lambda item: (-sum(c[item] for c in counters.values()), str(item)))
+    return [{'gram': item if isinstance(item, str) else ' '.join(item),
+             'total': sum(c[item] for c in counters.values()),
+             'counts': {company: c[item] for company, c in counters.items()}}
+            for item in ranked[:k]]
+
+
+def compute_combined(file_paths: List[str], backend='vader', jobs=1, cache_path=DEFAULT_CACHE_PATH):
+    """Analyse several processed subreddits together.
+
+    Every post is tokenized and stopword-filtered once, straight into its
+    company's n-gram counters, and all companies' texts go through a single
+    sentiment batch so text shared between subreddits is scored once.
+    Sentiment is aggregated per calendar day, which aligns companies whose
+    block boundaries differ.
+    """
+    frames = []
+    counters = {}
+    for path in file_paths:
+        company = get_filename(path)
+        df = load_processed(path, columns=COMBINED_COLUMNS)
+        df['company'] = company
+        ngram_counter = NGramCounter(n_values=(1, 2, 3), stop_words=ENGLISH_STOP_WORDS)
+        for t in df['combined_text']:
+            ngram_counter.add_text(t)
+        counters[company] = ngram_counter
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+
+    scorer = get_backend(backend)
+    scorer.prepare(df['combined_text'].tolist())
+    cache = SentimentCache(cache_path, namespace=scorer.name) if cache_path and scorer.cacheable else None
+    try:
+        df['Sentiment'] = score_batch(df['combined_text'], jobs=jobs, cache=cache, scorer=scorer.score)
+        df['Comment_Sentiment'] = score_comments(df['comments'], jobs=jobs, cache=cache, scorer=scorer.score)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    df['date'] = pd.to_datetime(df['date'])
+    grouped = df.groupby(['date', 'company'])
+    daily = pd.DataFrame({
+        'avg_sentiment': grouped['Sentiment'].mean(),
+        'avg_comment_sentiment': grouped['Comment_Sentiment'].mean(),
+        'num_comments': grouped['num_comments'].sum().astype('int64'),
+        'num_posts': grouped.size().astype('int64'),
+    }).reset_index()
+
+    # One column per company on a shared date axis; days a company has no posts stay NaN
+    aligned = daily.pivot(index='date', columns='company', values='avg_sentiment')
+    correlations = aligned.corr()
+
+    companies = [get_filename(path) for path in file_paths]
+    shared_grams = {
+        'words': shared_most_common({c: counters[c].counters[1] for c in companies}),
+        'bigrams': shared_most_common({c: counters[c].counters[2] for c in companies}),
+        'trigrams': shared_most_common({c: counters[c].counters[3] for c in companies}),
+    }
+    return CombinedReport(companies, daily, correlations, shared_grams)
+
+
+def write_combined(report: CombinedReport, filepathbase=COMBINED_DIR):
+    # Sentiment.parquet (long table), Correlations.json and SharedWords.json
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(filepathbase, exist_ok=True)
+    table = pa.Table.from_pandas(report.daily, preserve_index=False)
+    pq.write_table(table, os.path.join(filepathbase, 'Sentiment.parquet'))
+
+    correlations = report.correlations.astype(object).where(report.correlations.notna(), None)
+    with open(os.path.join(filepathbase, 'Correlations.json'), 'w') as f:
+        json.dump(correlations.to_dict(), f, indent=2)
+
+    with open(os.path.join(filepathbase, 'SharedWords.json'), 'w') as f:
+        json.dump(report.shared_grams, f, indent=2)
+
+
+def CombinedAnalysis(file_paths, backend='vader', jobs=1, cache_path=DEFAULT_CACHE_PATH, filepathbase=COMBINED_DIR):
+    report = compute_combined(file_paths, backend=backend, jobs=jobs, cache_path=cache_path)
+    write_combined(report, filepathbase)
+    logger.info("Combined report for %s saved to %s", ", ".join(report.companies), filepathbase)
+    return filepathbase
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-subreddit sentiment report over processed files.")
+    parser.add_argument("files", nargs="+", help="Processed files (json, parquet or feather).")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="vader")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--output", default=COMBINED_DIR)
+    args = parser.parse_args()
+    CombinedAnalysis(args.files, backend=args.backend, jobs=args.jobs, filepathbase=args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+import logging
+import os
+import sqlite3
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.EDA.ngrams import tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEDUP_PATH = "data/cache/dedup.sqlite"
+
+# Estimated Jaccard similarity of word shingles above which two posts count as the same post
+DEFAULT_THRESHOLD = 0.8
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs at similarity 0.8 share a band ~94% of the time, pairs at 0.5 ~6%
+BANDS = 16
+SHINGLE_SIZE = 3
+# Shorter documents (e.g. one-word titles) are never flagged; identical short text is not a repost
+MIN_TOKENS = 5
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _permutations(num_perm: int, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    # Fixed seed: signatures stored by one run must be comparable with the next run's
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Optional[np.ndarray]:
+    """32-bit hashes of a document's word ``size``-grams, or None if it has fewer than MIN_TOKENS words"""
+    tokens = tokenize(text)
+    if len(tokens) < max(MIN_TOKENS, size):
+        return None
+    grams = {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class DuplicateIndex:
+    """MinHash + LSH index of documents, persisted in SQLite, for near-duplicate lookups.
+
+    Each document gets a ``NUM_PERM``-value MinHash signature of its word
+    shingles; the signature is cut into ``bands`` and every band is a bucket key,
+    so a lookup only compares against documents sharing a bucket instead of the
+    whole corpus. Candidates are confirmed against ``threshold`` on the
+    estimated Jaccard similarity. The first document of a group is its canonical
+    one; later ones are flagged with the canonical's id.
+
+    Documents are keyed by id within a ``namespace`` (e.g. the company), and
+    their decisions are stored, so re-running over the same posts flags exactly
+    the same ones and only new posts are hashed. Documents are stored with their
+    post date so ``prune`` can drop the ones that have left the data window.
+    """
+
+    def __init__(self, path: str = DEFAULT_DEDUP_PATH, namespace: str = "", threshold: float = DEFAULT_THRESHOLD,
+                 num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.path = path
+        self.namespace = namespace
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a, self._b = _permutations(num_perm)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "namespace TEXT NOT NULL, doc_id TEXT NOT NULL, canonical TEXT, signature BLOB, date TEXT, "
+            "PRIMARY KEY (namespace, doc_id))")
+        # Indexes written before documents were dated; their rows keep a NULL date and are never pruned
+        if 'date' not in {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}:
+            self._conn.execute("ALTER TABLE documents ADD COLUMN date TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_date ON documents (namespace, date)")
+        self._conn.commit()
+        self._decisions: Dict[str, Optional[str]] = {}
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self._pending: List[Tuple[str, str, Optional[str], Optional[bytes], Optional[str]]] = []
+        self._load()
+
+    def _load(self) -> None:
+        rows = self._conn.execute("SELECT doc_id, canonical, signature FROM documents WHERE namespace = ?",
+                                  (self.namespace,))
+        for doc_id, canonical, signature in rows:
+            self._decisions[doc_id] = canonical
+            if canonical is None and signature is not None:
+                signature = np.frombuffer(signature, dtype=np.uint32)
+                if len(signature) == self.num_perm:
+                    self._insert(doc_id, signature)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        hashes = shingles(text)
+        if hashes is None:
+            return None
+        # (a * h + b) mod p for every permutation and shingle; the minimum per permutation is the signature
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return np.bitwise_and(permuted, _MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _insert(self, doc_id: str, signature: np.ndarray) -> None:
+        self._signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(doc_id)
+
+    def query(self, signature: np.ndarray) -> Optional[str]:
+        """Id of the most similar indexed canonical document at or above ``threshold``, if any"""
+        candidates = {doc_id for key in self._band_keys(signature) for doc_id in self._buckets.get(key, ())}
+        best, best_similarity = None, self.threshold
+        for doc_id in candidates:
+            similarity = float(np.mean(self._signatures[doc_id] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = doc_id, similarity
+        return best
+
+    def add(self, doc_id: str, text: str, date: Optional[str] = None) -> Optional[str]:
+        """Index a document; returns the canonical id it duplicates, or None if it is new or unique"""
+        if doc_id in self._decisions:
+            return self._decisions[doc_id]
+        signature = self.signature(text)
+        canonical = self.query(signature) if signature is not None else None
+        if canonical is None and signature is not None:
+            self._insert(doc_id, signature)
+        self._decisions[doc_id] = canonical
+        # Duplicates keep no signature: later posts are matched against the canonical one
+        self._pending.append((self.namespace, doc_id, canonical,
+                              signature.tobytes() if canonical is None and signature is not None else None,
+                              date))
+        return canonical
+
+    def add_many(self, doc_ids: Iterable[str], texts: Iterable[str],
+                 dates: Optional[Iterable[str]] = None) -> List[Optional[str]]:
+        doc_ids, texts = list(doc_ids), list(texts)
+        dates = list(dates) if dates is not None else [None] * len(doc_ids)
+        duplicate_of = [self.add(doc_id, text, date) for doc_id, text, date in zip(doc_ids, texts, dates)]
+        self.flush()
+        return duplicate_of
+
+    def prune(self, before: str) -> int:
+        """Forget documents dated before ``before`` (e.g. the oldest post still in the data).
+
+        Their posts have expired, so they can no longer be dropped or be the
+        canonical of a post that is; keeping them would only grow every load.
+        Returns the number of documents removed.
+        """
+        self.flush()
+        with self._conn:
+            expired = [doc_id for doc_id, in self._conn.execute(
+                "SELECT doc_id FROM documents WHERE namespace = ? AND date < ?", (self.namespace, before))]
+            self._conn.execute("DELETE FROM documents WHERE namespace = ? AND date < ?", (self.namespace, before))
+        if expired:
+            expired_set = set(expired)
+            for doc_id in expired:
+                self._decisions.pop(doc_id, None)
+                self._signatures.pop(doc_id, None)
+            for key in list(self._buckets):
+                remaining = [doc_id for doc_id in self._buckets[key] if doc_id not in expired_set]
+                if remaining:
+                    self._buckets[key] = remaining
+                else:
+                    del self._buckets[key]
+            logger.info("Pruned %d near-duplicate index entries dated before %s", len(expired), before)
+        return len(expired)
+
+    def flush(self) -> None:
+        if self._pending:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO documents (namespace, doc_id, canonical, signature, date) "
+                    "VALUES (?, ?, ?, ?, ?)", self._pending)
+            self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def drop_near_duplicates(df: pd.DataFrame, index: DuplicateIndex, present: Optional[set] = None) -> pd.DataFrame:
+    """Rows of ``df`` (post_id, combined_text, date) that are not near-duplicates of another post in the data.
+
+    A post is only dropped while its group is represented in the data:
+    ``df``'s own ids, plus ``present`` (ids already seen, when reading in chunks;
+    updated in place). When the canonical post has expired, the group's first
+    remaining copy stands in for it and the other copies are still dropped.
+    """
+    post_ids = df['post_id'].astype(str).tolist()
+    dates = df['date'].astype(str).tolist() if 'date' in df.columns else None
+    duplicate_of = index.add_many(post_ids, df['combined_text'], dates)
+    present = present if present is not None else set()
+    present.update(post_ids)
+    keep = np.ones(len(post_ids), dtype=bool)
+    for i, canonical in enumerate(duplicate_of):
+        if canonical is None:
+            continue
+        if canonical in present:
+            keep[i] = False
+        else:
+            present.add(canonical)  # This copy now represents the expired canonical's group
+    if not keep.all():
+        logger.info("Skipping %d near-duplicate posts of %d", int((~keep).sum()), len(df))
+    return df if keep.all() else df[keep].copy()
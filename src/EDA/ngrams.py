@@ -0,0 +1,119 @@
+import heapq
+import re
+from collections import Counter
+from itertools import islice
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens of a document, in one regex pass"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter sketch with at most ``capacity`` counters.
+
+    Drop-in for ``Counter.update``/``most_common`` when the number of distinct
+    items is too large to count exactly. Reported counts overestimate the true
+    count by at most the count of the item that was evicted to make room
+    (tracked in ``errors``); any item whose true count exceeds N/capacity is
+    guaranteed to be present.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        # One (count, seq, item) entry per monitored item. Counts only grow, so an
+        # entry can be stale (too low) but never too high; stale entries are
+        # refreshed lazily when they reach the top of the heap.
+        self._heap: List[Tuple[int, int, Hashable]] = []
+        self._seq = 0
+
+    def _pop_min(self) -> Tuple[Hashable, int]:
+        while True:
+            count, _, item = self._heap[0]
+            current = self.counts[item]
+            if current == count:
+                heapq.heappop(self._heap)
+                return item, count
+            self._seq += 1
+            heapq.heapreplace(self._heap, (current, self._seq, item))
+
+    def _push(self, item: Hashable, count: int) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (count, self._seq, item))
+
+    def update(self, items: Iterable[Hashable]) -> None:
+        counts = self.counts
+        for item in items:
+            if item in counts:
+                counts[item] += 1
+            elif len(counts) < self.capacity:
+                counts[item] = 1
+                self.errors[item] = 0
+                self._push(item, 1)
+            else:
+                evicted, floor = self._pop_min()
+                del counts[evicted]
+                del self.errors[evicted]
+                counts[item] = floor + 1
+                self.errors[item] = floor
+                self._push(item, floor + 1)
+
+    def most_common(self, k: Optional[int] = None) -> List[Tuple[Hashable, int]]:
+        if k is None:
+            return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)
+        return heapq.nlargest(k, self.counts.items(), key=lambda kv: kv[1])
+
+
+class NGramCounter:
+    """Counts unigrams and n-grams document by document, never across documents.
+
+    Stopwords are dropped before n-grams are formed. Counts go straight into one
+    counter per n (exact ``Counter`` by default, ``SpaceSaving`` when ``capacity``
+    is given) without materializing n-gram lists.
+    """
+
+    def __init__(self, n_values: Iterable[int] = (1, 2, 3), stop_words: Iterable[str] = (),
+                 capacity: Optional[int] = None):
+        self.stop_words = frozenset(stop_words)
+        self.counters = {n: Counter() if capacity is None else SpaceSaving(capacity) for n in n_values}
+
+    def add(self, tokens: List[str]) -> None:
+        words = [token for token in tokens if token not in self.stop_words]
+        for n, counter in self.counters.items():
+            if n == 1:
+                counter.update(words)
+            else:
+                counter.update(zip(*(islice(words, i, None) for i in range(n))))
+
+    def add_text(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        self.add(tokens)
+        return tokens
+
+    def most_common(self, n: int, k: int = 20) -> List[Tuple[Hashable, int]]:
+        return self.counters[n].most_common(k)
+
+    def merge(self, counts: Dict[int, Counter]) -> None:
+        """Add exact per-n counts (e.g. another document set's counters) to this counter"""
+        for n, counter in counts.items():
+            if isinstance(self.counters[n], SpaceSaving):
+                raise TypeError("merge needs exact counters (capacity=None)")
+            self.counters[n].update(counter)
+
+    def to_json(self) -> Dict[str, Dict[str, int]]:
+        # n-gram tuples become space-joined strings (tokens never contain spaces)
+        return {str(n): {gram if n == 1 else ' '.join(gram): count for gram, count in counter.items()}
+                for n, counter in self.counters.items()}
+
+    @staticmethod
+    def counts_from_json(data: Dict[str, Dict[str, int]]) -> Dict[int, Counter]:
+        return {int(n): Counter({gram if n == '1' else tuple(gram.split(' ')): count
+                                 for gram, count in grams.items()})
+                for n, grams in data.items()}
@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")  # Headless: render straight to files, never open windows
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+# Columns of the per-post frame the figures need; only these are sent to workers
+PLOT_COLUMNS = ['date', 'Sentiment', 'post_length', 'hour', 'popularity', 'block_index']
+
+
+def plot_rolling_score(daily_scores, path):
+    fig = plt.figure(figsize=(12, 6))
+    try:
+        plt.plot(daily_scores['day'], daily_scores['score'], alpha=0.4, label='Daily Score')
+        plt.plot(daily_scores['day'], daily_scores['rolling_score'], color='red', label='3-Day Rolling Avg')
+        plt.title("Reddit Post Scores with Rolling Average")
+        plt.xlabel("Date")
+        plt.ylabel("Score")
+        plt.legend()
+        plt.grid(False)
+        plt.xticks(rotation=0)
+        plt.tight_layout()
+        plt.savefig(path)
+    finally:
+        plt.close(fig)
+
+
+def plot_sentiment_vs_length(df, path):
+    fig = plt.figure(figsize=(10, 6))
+    try:
+        sns.scatterplot(data=df, x='post_length', y='Sentiment')
+        plt.title('Sentiment vs Post Length')
+        plt.xlabel('Post Length (characters)')
+        plt.ylabel('Sentiment')
+        plt.grid(False)
+        plt.tight_layout()
+        plt.savefig(path)
+    finally:
+        plt.close(fig)
+
+
+def plot_sentiment_vs_hour(df, path):
+    fig = plt.figure(figsize=(10, 6))
+    try:
+        sns.boxplot(data=df, x='hour', y='Sentiment')
+        plt.title('Sentiment vs Time of Day')
+        plt.xlabel('Hour')
+        plt.ylabel('Sentiment')
+        plt.grid(False)
+        plt.tight_layout()
+        plt.savefig(path)
+    finally:
+        plt.close(fig)
+
+
+def plot_sentiment_vs_popularity(df, path):
+    fig = plt.figure(figsize=(10, 6))
+    try:
+        sns.scatterplot(data=df, x='popularity', y='Sentiment')
+        plt.title('Sentiment vs Popularity (Score + Comments)')
+        plt.xlabel('Popularity')
+        plt.ylabel('Sentiment')
+        plt.grid(False)
+        plt.tight_layout()
+        plt.savefig(path)
+    finally:
+        plt.close(fig)
+
+
+def plot_sentiment_over_time(df, path):
+    sentiment_vs_date = df[['date', 'Sentiment']]
+
+    # Filter for year 2025
+    sentiment_vs_date_2025 = sentiment_vs_date[sentiment_vs_date['date'].dt.year == 2025]
+
+    # Sort by date
+    sentiment_vs_date_2025 = sentiment_vs_date_2025.sort_values("date")
+
+    # Apply a 3-day rolling average for smoothing
+    sentiment_vs_date_2025['Smoothed Sentiment'] = sentiment_vs_date_2025['Sentiment'].rolling(window=3).mean()
+
+    # whitegrid only for this figure, not for every later figure in the process
+    with plt.rc_context():
+        sns.set_theme(style="whitegrid")
+        fig = plt.figure(figsize=(12, 6))
+        try:
+            sns.lineplot(data=sentiment_vs_date_2025, x='date', y='Smoothed Sentiment', marker='o', color='steelblue')
+            plt.title('Sentiment Trend Over Time (2025)', fontsize=16)
+            plt.xlabel('Date')
+            plt.ylabel('Average Sentiment (3-Day Rolling)')
+            plt.xticks(rotation=45)
+            plt.tight_layout()
+            plt.savefig(path)
+        finally:
+            plt.close(fig)
+
+
+def plot_posts_per_block(df, path):
+    # Count how many posts are in each block
+    block_counts = df['block_index'].value_counts().sort_index()
+
+    with plt.rc_context():
+        sns.set_theme(style="whitegrid")
+        fig = plt.figure(figsize=(8, 5))
+        try:
+            sns.barplot(x=block_counts.index, y=block_counts.values, hue=block_counts.index,
+                        palette="viridis", legend=False)
+            plt.title("Number of Posts per 3-Day Block (block_index)")
+            plt.xlabel("Block Index")
+            plt.ylabel("Number of Posts")
+            plt.tight_layout()
+            plt.grid(axis='y')
+            plt.savefig(path)
+        finally:
+            plt.close(fig)
+
+
+def _render(job):
+    plot, data, path = job
+    plot(data, path)
+    return path
+
+
+def render_plots(result, filepathbase, jobs=1):
+    """Render the six PostEDA figures for an AnalysisResult.
+
+    Every figure is closed after saving, so long batch runs do not accumulate
+    them. With jobs > 1 the figures are rendered in worker processes.
+    """
+    os.makedirs(filepathbase, exist_ok=True)
+    df = result.df[PLOT_COLUMNS]
+    plot_jobs = [
+        (plot_rolling_score, result.daily_scores, os.path.join(filepathbase, 'RollingScore.png')),
+        (plot_sentiment_vs_length, df, os.path.join(filepathbase, 'SentVlen.png')),
+        (plot_sentiment_vs_hour, df, os.path.join(filepathbase, 'SentVTime.png')),
+        (plot_sentiment_vs_popularity, df, os.path.join(filepathbase, 'SentVPop.png')),
+        (plot_sentiment_over_time, df, os.path.join(filepathbase, 'SentOverTime.png')),
+        (plot_posts_per_block, df, os.path.join(filepathbase, 'PostPerBlock.png')),
+    ]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(plot_jobs))) as pool:
+            return list(pool.map(_render, plot_jobs))
+    return [_render(job) for job in plot_jobs]
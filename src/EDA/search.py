@@ -0,0 +1,303 @@
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from src.EDA.backends import BACKENDS, get_backend
+from src.EDA.ngrams import tokenize
+from src.EDA.sentiment import DEFAULT_CACHE_PATH, SentimentCache, score_batch, text_hash
+from src.Preprocessing.preprocessor import get_filename, load_processed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = "data/cache/search.sqlite"
+INDEX_COLUMNS = ['post_id', 'date', 'block_index', 'score', 'combined_text']
+# Time buckets for sentiment queries -> pandas period frequency
+BUCKETS = {'day': 'D', 'week': 'W', 'month': 'M'}
+PHRASE_PATTERN = re.compile(r'"([^"]*)"')
+# Stay under SQLite's bound-parameter limit when looking documents up
+_LOOKUP_BATCH = 900
+
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """Keywords and quoted phrases of a query, tokenized like the indexed text"""
+    phrases = [tokenize(p) for p in PHRASE_PATTERN.findall(query)]
+    keywords = tokenize(PHRASE_PATTERN.sub(' ', query))
+    # A one-word phrase is just a keyword
+    keywords += [p[0] for p in phrases if len(p) == 1]
+    return keywords, [p for p in phrases if len(p) > 1]
+
+
+def term_positions(tokens: List[str]) -> Dict[str, array]:
+    positions: Dict[str, array] = {}
+    for position, token in enumerate(tokens):
+        positions.setdefault(token, array('I')).append(position)
+    return positions
+
+
+class SearchIndex:
+    """On-disk inverted index of processed posts with their sentiment, in SQLite.
+
+    ``docs`` holds one row per post (company, post_id, date, block_index,
+    sentiment, score) and ``postings`` maps every term to the posts containing it,
+    with the token positions phrase queries need. A query intersects the
+    postings of its terms (rarest first) and then reads only the matching docs,
+    so it never scans the processed files.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        with self._conn:
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                "doc INTEGER PRIMARY KEY, company TEXT NOT NULL, post_id TEXT NOT NULL, date TEXT NOT NULL, "
+                "block_index INTEGER, sentiment REAL, score INTEGER, text_hash TEXT NOT NULL, "
+                "UNIQUE (company, post_id));"
+                "CREATE INDEX IF NOT EXISTS docs_company_date ON docs (company, date);"
+                "CREATE TABLE IF NOT EXISTS terms (term_id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE);"
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "term_id INTEGER NOT NULL, doc INTEGER NOT NULL, positions BLOB NOT NULL, "
+                "PRIMARY KEY (term_id, doc)) WITHOUT ROWID;"
+                "CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);")
+        self._term_ids: Optional[Dict[str, int]] = None
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Indexing
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = self._conn.execute(
+                "INSERT INTO terms (term) VALUES (?)", (term,)).lastrowid
+        return term_id
+
+    def _delete_docs(self, docs: List[int]) -> None:
+        for start in range(0, len(docs), _LOOKUP_BATCH):
+            batch = docs[start:start + _LOOKUP_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            self._conn.execute(f"DELETE FROM postings WHERE doc IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM docs WHERE doc IN ({placeholders})", batch)
+
+    def index_file(self, file_path: str, backend: str = 'vader', jobs: int = 1,
+                   cache_path: Optional[str] = DEFAULT_CACHE_PATH) -> int:
+        """Bring one company's posts in the index up to date with its processed file.
+
+        The processed file is the company's full history, so posts that left it
+        are removed. Only new posts and posts whose text changed are tokenized
+        and scored (scores come from the shared sentiment cache when the pipeline
+        already computed them); the rest only get their date, block and score
+        refreshed. Returns the number of posts (re)indexed.
+        """
+        company = get_filename(file_path)
+        df = load_processed(file_path, columns=INDEX_COLUMNS)
+        scorer = get_backend(backend)
+        # The backend is part of the hash so switching backends rescores everything
+        hashes = [text_hash(f"{scorer.name}\0{text}") for text in df['combined_text']]
+        post_ids = df['post_id'].astype(str).tolist()
+
+        existing = {post_id: (doc, h) for doc, post_id, h in self._conn.execute(
+            "SELECT doc, post_id, text_hash FROM docs WHERE company = ?", (company,))}
+        current = set(post_ids)
+        stale = [doc for post_id, (doc, _) in existing.items() if post_id not in current]
+        changed, seen = [], set()
+        for i, (post_id, h) in enumerate(zip(post_ids, hashes)):
+            if post_id not in seen and (post_id not in existing or existing[post_id][1] != h):
+                changed.append(i)
+            seen.add(post_id)
+
+        sentiments = []
+        if changed:
+            texts = df['combined_text'].iloc[changed].tolist()
+            scorer.prepare(texts)
+            cache = SentimentCache(cache_path, namespace=scorer.name) if cache_path and scorer.cacheable else None
+            try:
+                sentiments = score_batch(texts, jobs=jobs, cache=cache, scorer=scorer.score)
+            finally:
+                if cache is not None:
+                    cache.close()
+
+        if self._term_ids is None:
+            self._term_ids = dict(self._conn.execute("SELECT term, term_id FROM terms"))
+        try:
+            self._write(company, df, post_ids, hashes, changed, sentiments,
+                        stale + [existing[post_ids[i]][0] for i in changed if post_ids[i] in existing])
+        except Exception:
+            self._term_ids = None  # Terms inserted by the rolled-back transaction are gone
+            raise
+        logger.info("Search index: %s has %d posts (%d indexed, %d removed)",
+                    company, len(post_ids), len(changed), len(stale))
+        return len(changed)
+
+    def _write(self, company, df, post_ids, hashes, changed, sentiments, removed) -> None:
+        with self._conn:
+            self._delete_docs(removed)
+            for i, sentiment in zip(changed, sentiments):
+                row = df.iloc[i]
+                doc = self._conn.execute(
+                    "INSERT INTO docs (company, post_id, date, block_index, sentiment, score, text_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (company, post_ids[i], str(row['date']), int(row['block_index']), float(sentiment),
+                     int(row['score']), hashes[i])).lastrowid
+                self._conn.executemany(
+                    "INSERT INTO postings (term_id, doc, positions) VALUES (?, ?, ?)",
+                    [(self._term_id(term), doc, positions.tobytes())
+                     for term, positions in term_positions(tokenize(row['combined_text'])).items()])
+            # Dates, blocks and Reddit scores move even when the text does not
+            self._conn.executemany(
+                "UPDATE docs SET date = ?, block_index = ?, score = ? WHERE company = ? AND post_id = ?",
+                [(str(date), int(block_index), int(score), company, post_id)
+                 for post_id, date, block_index, score in zip(post_ids, df['date'], df['block_index'], df['score'])])
+
+    def index_files(self, file_paths: Iterable[str], backend: str = 'vader', jobs: int = 1,
+                    cache_path: Optional[str] = DEFAULT_CACHE_PATH) -> int:
+        return sum(self.index_file(path, backend, jobs, cache_path) for path in file_paths)
+
+    # Queries
+
+    def _postings(self, term: str) -> Dict[int, bytes]:
+        return dict(self._conn.execute(
+            "SELECT p.doc, p.positions FROM postings p JOIN terms t ON t.term_id = p.term_id WHERE t.term = ?",
+            (term,)))
+
+    def _phrase_docs(self, phrase: List[str], within: Optional[Set[int]]) -> Set[int]:
+        postings = [self._postings(term) for term in phrase]
+        docs = set.intersection(*(set(p) for p in postings))
+        if within is not None:
+            docs &= within
+        matches = set()
+        for doc in docs:
+            starts = set(array('I', postings[0][doc]))
+            for offset, term_postings in enumerate(postings[1:], start=1):
+                positions = set(array('I', term_postings[doc]))
+                starts = {s for s in starts if s + offset in positions}
+                if not starts:
+                    break
+            if starts:
+                matches.add(doc)
+        return matches
+
+    def matching_docs(self, query: str) -> Set[int]:
+        """Ids of the posts containing every keyword and every quoted phrase of ``query``"""
+        keywords, phrases = parse_query(query)
+        if not keywords and not phrases:
+            return set()
+        docs: Optional[Set[int]] = None
+        # Rarest keyword first keeps every intersection small
+        keyword_docs = sorted((set(self._postings(term)) for term in set(keywords)), key=len)
+        for found in keyword_docs:
+            docs = found if docs is None else docs & found
+            if not docs:
+                return set()
+        for phrase in phrases:
+            docs = self._phrase_docs(phrase, docs)
+            if not docs:
+                return set()
+        return docs
+
+    def search(self, query: str, companies: Optional[List[str]] = None, since: Optional[str] = None,
+               until: Optional[str] = None) -> pd.DataFrame:
+        """Matching posts (company, post_id, date, block_index, sentiment, score), newest first.
+
+        ``since`` and ``until`` are inclusive ISO dates.
+        """
+        docs = sorted(self.matching_docs(query))
+        filters, params = [], []
+        if companies:
+            filters.append(f"company IN ({','.join('?' * len(companies))})")
+            params.extend(companies)
+        if since:
+            filters.append("date >= ?")
+            params.append(since)
+        if until:
+            filters.append("date <= ?")
+            params.append(until)
+        rows = []
+        for start in range(0, len(docs), _LOOKUP_BATCH):
+            batch = docs[start:start + _LOOKUP_BATCH]
+            where = ' AND '.join([f"doc IN ({','.join('?' * len(batch))})", *filters])
+            rows.extend(self._conn.execute(
+                f"SELECT company, post_id, date, block_index, sentiment, score FROM docs WHERE {where}",
+                [*batch, *params]))
+        columns = ['company', 'post_id', 'date', 'block_index', 'sentiment', 'score']
+        return pd.DataFrame(rows, columns=columns).sort_values(['date', 'company'], ascending=[False, True],
+                                                               ignore_index=True)
+
+    def sentiment(self, query: str, bucket: str = 'day', companies: Optional[List[str]] = None,
+                  since: Optional[str] = None, until: Optional[str] = None) -> pd.DataFrame:
+        """Sentiment of the matching posts per time bucket and company.
+
+        Columns: period (start date of the day, week or month), company,
+        num_posts, avg_sentiment and total_score.
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket '{bucket}', expected one of {sorted(BUCKETS)}")
+        posts = self.search(query, companies, since, until)
+        columns = ['period', 'company', 'num_posts', 'avg_sentiment', 'total_score']
+        if posts.empty:
+            return pd.DataFrame(columns=columns)
+        posts['period'] = pd.to_datetime(posts['date']).dt.to_period(BUCKETS[bucket]).dt.start_time.dt.date
+        grouped = posts.groupby(['period', 'company'])
+        return pd.DataFrame({
+            'num_posts': grouped.size(),
+            'avg_sentiment': grouped['sentiment'].mean(),
+            'total_score': grouped['score'].sum(),
+        }).reset_index()[columns]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword and phrase search over processed posts, with sentiment.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Path of the SQLite search index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Index (or update) processed files.")
+    build.add_argument("files", nargs="+", help="Processed files (json, parquet or feather).")
+    build.add_argument("--backend", choices=sorted(BACKENDS), default="vader")
+    build.add_argument("--jobs", type=int, default=1)
+
+    query = commands.add_parser("query", help='Sentiment of posts matching e.g. \'rtx "driver update"\'.')
+    query.add_argument("query")
+    query.add_argument("--company", action="append", help="Only these companies (repeatable).")
+    query.add_argument("--since", help="First date, YYYY-MM-DD.")
+    query.add_argument("--until", help="Last date, YYYY-MM-DD.")
+    query.add_argument("--days", type=int, help="Only the last N days (overrides --since).")
+    query.add_argument("--bucket", choices=list(BUCKETS), default="day")
+    query.add_argument("--posts", action="store_true", help="List the matching posts instead of buckets.")
+    args = parser.parse_args()
+
+    with SearchIndex(args.index) as index:
+        if args.command == "build":
+            index.index_files(args.files, backend=args.backend, jobs=args.jobs)
+            return
+        since = args.since
+        if args.days is not None:
+            since = (datetime.now(timezone.utc) - timedelta(days=args.days)).date().isoformat()
+        start = time.perf_counter()
+        if args.posts:
+            table = index.search(args.query, args.company, since, args.until)
+        else:
+            table = index.sentiment(args.query, args.bucket, args.company, since, args.until)
+        elapsed = time.perf_counter() - start
+    print(table.to_string(index=False) if not table.empty else "No matching posts")
+    print(f"({elapsed * 1000:.1f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = "data/cache/sentiment.sqlite"
+
+# Below this many uncached texts a process pool costs more to start than it saves
+PARALLEL_THRESHOLD = 20000
+CHUNK_SIZE = 5000
+# Stay under SQLite's bound-parameter limit when looking hashes up
+_LOOKUP_BATCH = 900
+
+
+@lru_cache(maxsize=None)
+def get_analyzer():
+    """VADER analyzer for this process; vaderSentiment is imported and its lexicon parsed only on first use"""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+def score_texts(texts: Iterable[str]) -> List[float]:
+    """VADER compound score for every text, in order"""
+    polarity_scores = get_analyzer().polarity_scores
+    return [polarity_scores(text)['compound'] for text in texts]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class SentimentCache:
+    """Content-hash -> score cache persisted in SQLite, shared by every run.
+
+    Scores are namespaced (e.g. by analyzer) so different scorers never mix.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, namespace: str = "vader"):
+        self.path = path
+        self.namespace = namespace
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "namespace TEXT NOT NULL, hash TEXT NOT NULL, score REAL NOT NULL, "
+            "PRIMARY KEY (namespace, hash))")
+
+    def get_many(self, hashes: List[str]) -> Dict[str, float]:
+        found = {}
+        for start in range(0, len(hashes), _LOOKUP_BATCH):
+            batch = hashes[start:start + _LOOKUP_BATCH]
+            rows = self._conn.execute(
+                f"SELECT hash, score FROM scores WHERE namespace = ? AND hash IN ({','.join('?' * len(batch))})",
+                [self.namespace, *batch]).fetchall()
+            found.update(rows)
+        return found
+
+    def put_many(self, scores: Dict[str, float]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (namespace, hash, score) VALUES (?, ?, ?)",
+                [(self.namespace, h, s) for h, s in scores.items()])
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def score_batch(texts: Iterable[str], jobs: int = 1, cache: Optional[SentimentCache] = None,
+                scorer: Callable[[List[str]], List[float]] = score_texts) -> List[float]:
+    """Score many texts at once.
+
+    Identical texts are scored once, texts already in ``cache`` are not rescored,
+    and large batches are split across ``jobs`` worker processes. ``scorer`` maps a
+    list of texts to their scores (VADER by default) and must be picklable for jobs > 1.
+    """
+    texts = list(texts)
+    hashes = [text_hash(text) for text in texts]
+    known = cache.get_many(list(set(hashes))) if cache is not None else {}
+
+    pending = {}
+    for h, text in zip(hashes, texts):
+        if h not in known and h not in pending:
+            pending[h] = text
+
+    if pending:
+        pending_texts = list(pending.values())
+        if jobs > 1 and len(pending_texts) >= PARALLEL_THRESHOLD:
+            chunks = [pending_texts[i:i + CHUNK_SIZE] for i in range(0, len(pending_texts), CHUNK_SIZE)]
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                new_scores = [score for chunk in pool.map(scorer, chunks) for score in chunk]
+        else:
+            new_scores = scorer(pending_texts)
+        fresh = dict(zip(pending.keys(), new_scores))
+        if cache is not None:
+            cache.put_many(fresh)
+        known.update(fresh)
+
+    logger.debug("Scored %d texts (%d computed, %d from cache)", len(texts), len(pending), len(texts) - len(pending))
+    return [known[h] for h in hashes]
+
+
+def score_comments(comments_per_post: Iterable[List[Dict]], jobs: int = 1,
+                   cache: Optional[SentimentCache] = None,
+                   scorer: Callable[[List[str]], List[float]] = score_texts) -> List[float]:
+    """Mean sentiment of each post's preprocessed comments (NaN for posts without comments)"""
+    comments_per_post = list(comments_per_post)
+    # Columnar files hand comments over as arrays, JSON as lists; missing means none
+    comments_per_post = [comments if comments is not None else [] for comments in comments_per_post]
+    bodies = [comment['comment_body'] for comments in comments_per_post for comment in comments]
+    scores = score_batch(bodies, jobs=jobs, cache=cache, scorer=scorer)
+
+    means = []
+    offset = 0
+    for comments in comments_per_post:
+        n = len(comments)
+        means.append(float(np.mean(scores[offset:offset + n])) if n else float('nan'))
+        offset += n
+    return means
@@ -0,0 +1,221 @@
+import logging
+import math
+from itertools import combinations
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.EDA.backends import get_backend
+from src.EDA.dedup import DuplicateIndex, drop_near_duplicates
+from src.EDA.ngrams import NGramCounter
+from src.EDA.sentiment import DEFAULT_CACHE_PATH, SentimentCache, score_batch, score_comments
+from src.EDA.stopwords import ENGLISH_STOP_WORDS
+from src.Preprocessing.preprocessor import load_processed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 50000
+STREAM_COLUMNS = ['date', 'time', 'score', 'num_comments', 'combined_text', 'comments', 'block_index']
+CORRELATION_COLUMNS = ['post_length', 'hour', 'popularity', 'Sentiment']
+
+
+def iter_processed_chunks(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Yield a processed file as DataFrames of at most ``chunk_size`` posts, in file order.
+
+    Parquet is read batch by batch and Feather through a memory map, so only one
+    chunk is materialized at a time. Nested JSON cannot be parsed incrementally
+    and is loaded whole before being sliced.
+    """
+    if file_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    elif file_path.endswith('.feather'):
+        import pyarrow.feather as feather
+        table = feather.read_table(file_path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield batch.to_pandas()
+    else:
+        logger.warning("%s is JSON and is loaded whole; use parquet or feather to bound memory", file_path)
+        df = load_processed(file_path, columns=columns)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+
+class KahanMean:
+    """Running mean using the same compensated summation as pandas' groupby mean,
+    so streamed block averages match the in-memory ones exactly"""
+    __slots__ = ('count', 'total', 'compensation')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, value: float) -> None:
+        if value != value:  # NaN is skipped, like pandas
+            return
+        self.count += 1
+        y = value - self.compensation
+        t = self.total + y
+        self.compensation = t - self.total - y
+        if self.compensation != self.compensation:
+            self.compensation = 0.0
+        self.total = t
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float('nan')
+
+
+class BlockAggregate:
+    __slots__ = ('date', 'sentiment', 'comment_sentiment', 'num_comments', 'num_posts')
+
+    def __init__(self, date):
+        self.date = date
+        self.sentiment = KahanMean()
+        self.comment_sentiment = KahanMean()
+        self.num_comments = 0
+        self.num_posts = 0
+
+
+class RunningCorrelation:
+    """Pairwise-complete Pearson correlations from online co-moment updates.
+
+    Each chunk's moments are merged with Chan et al.'s parallel update, so only
+    O(columns^2) numbers are kept however many rows stream through.
+    """
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        # (n, mean_x, mean_y, m2_x, m2_y, c_xy) per unordered column pair
+        self.moments = {pair: (0, 0.0, 0.0, 0.0, 0.0, 0.0) for pair in combinations(columns, 2)}
+
+    def update(self, frame: pd.DataFrame) -> None:
+        for (a, b), (n, mean_a, mean_b, m2_a, m2_b, c_ab) in self.moments.items():
+            both = frame[[a, b]].dropna()
+            k = len(both)
+            if k == 0:
+                continue
+            x = both[a].to_numpy(dtype=float)
+            y = both[b].to_numpy(dtype=float)
+            bx, by = x.mean(), y.mean()
+            dx, dy = x - bx, y - by
+            total = n + k
+            delta_a, delta_b = bx - mean_a, by - mean_b
+            self.moments[(a, b)] = (
+                total,
+                mean_a + delta_a * k / total,
+                mean_b + delta_b * k / total,
+                m2_a + dx @ dx + delta_a * delta_a * n * k / total,
+                m2_b + dy @ dy + delta_b * delta_b * n * k / total,
+                c_ab + dx @ dy + delta_a * delta_b * n * k / total,
+            )
+
+    def corr(self) -> pd.DataFrame:
+        result = pd.DataFrame(np.eye(len(self.columns)), index=self.columns, columns=self.columns)
+        for (a, b), (n, _, _, m2_a, m2_b, c_ab) in self.moments.items():
+            value = c_ab / math.sqrt(m2_a * m2_b) if n > 1 and m2_a > 0 and m2_b > 0 else float('nan')
+            result.loc[a, b] = result.loc[b, a] = value
+        return result
+
+
+def compute_analysis_chunked(file_path, chunk_size=DEFAULT_CHUNK_SIZE, backend='vader', jobs=1,
+                             cache_path=DEFAULT_CACHE_PATH, ngram_capacity=None, dedup_path=None):
+    """Out-of-core counterpart of ``analysis.compute_analysis``.
+
+    Reads the processed file ``chunk_size`` posts at a time and folds every chunk
+    into running per-block, per-day and correlation aggregates, so peak memory
+    depends on the chunk size (plus vocabulary, unless ``ngram_capacity`` bounds
+    it) rather than on history length. Produces the same Export.json and Words.json;
+    the returned result has no per-post frame, so figures cannot be rendered from it.
+    With ``dedup_path`` near-duplicate posts are dropped from every chunk first.
+    """
+    from src.EDA.analysis import AnalysisResult, get_filename
+
+    scorer = get_backend(backend)
+    cache = SentimentCache(cache_path, namespace=scorer.name) if cache_path and scorer.cacheable else None
+    ngram_counter = NGramCounter(n_values=(1, 2, 3), stop_words=ENGLISH_STOP_WORDS, capacity=ngram_capacity)
+    blocks: Dict[int, BlockAggregate] = {}
+    daily: Dict = {}
+    correlation = RunningCorrelation(CORRELATION_COLUMNS)
+    total_posts = 0
+    index = DuplicateIndex(dedup_path, namespace=get_filename(file_path)) if dedup_path else None
+    seen_ids = set()
+    oldest = None
+
+    try:
+        for chunk in iter_processed_chunks(file_path, chunk_size,
+                                           STREAM_COLUMNS + ['post_id'] if index is not None else STREAM_COLUMNS):
+            if index is not None:
+                if len(chunk):
+                    oldest = min(oldest, chunk['date'].min()) if oldest is not None else chunk['date'].min()
+                chunk = drop_near_duplicates(chunk, index, present=seen_ids)
+            chunk = chunk.copy()
+            total_posts += len(chunk)
+            chunk['date'] = pd.to_datetime(chunk['date'])
+
+            for day, score in chunk.groupby(chunk['date'].dt.date)['score'].sum().items():
+                daily[day] = daily.get(day, 0) + score
+
+            texts = chunk['combined_text'].tolist()
+            for t in texts:
+                ngram_counter.add_text(t)
+
+            scorer.prepare(texts)
+            chunk['Sentiment'] = score_batch(texts, jobs=jobs, cache=cache, scorer=scorer.score)
+            chunk['Comment_Sentiment'] = score_comments(chunk['comments'], jobs=jobs, cache=cache,
+                                                        scorer=scorer.score)
+
+            chunk['post_length'] = chunk['combined_text'].str.len()
+            chunk['hour'] = pd.to_datetime(chunk['time'], format='%H:%M:%S', errors='coerce').dt.hour
+            chunk['popularity'] = chunk['score'] + chunk['num_comments']
+            correlation.update(chunk[CORRELATION_COLUMNS])
+
+            for block_index, date, sentiment, comment_sentiment, num_comments in zip(
+                    chunk['block_index'], chunk['date'], chunk['Sentiment'],
+                    chunk['Comment_Sentiment'], chunk['num_comments']):
+                block = blocks.get(block_index)
+                if block is None:
+                    block = blocks[block_index] = BlockAggregate(date)
+                elif pd.isna(block.date):
+                    block.date = date
+                block.sentiment.add(sentiment)
+                block.comment_sentiment.add(comment_sentiment)
+                block.num_comments += int(num_comments)
+                block.num_posts += 1
+            logger.debug("Streamed %d posts from %s", total_posts, file_path)
+    finally:
+        if cache is not None:
+            cache.close()
+        if index is not None:
+            if oldest is not None:
+                index.prune(oldest)
+            index.close()
+
+    daily_scores = pd.DataFrame(sorted(daily.items()), columns=['day', 'score'])
+    daily_scores['rolling_score'] = daily_scores['score'].rolling(window=3).mean()
+
+    ordered = [blocks[b] for b in sorted(blocks)]
+    exportDF = pd.DataFrame()
+    exportDF['date'] = pd.Series([b.date for b in ordered], dtype='datetime64[ns]').values
+    exportDF['company'] = get_filename(file_path)
+    exportDF['avg_sentiment'] = [b.sentiment.mean for b in ordered]
+    exportDF['avg_comment_sentiment'] = [b.comment_sentiment.mean for b in ordered]
+    exportDF['num_comments'] = [b.num_comments for b in ordered]
+    exportDF['num_posts'] = [b.num_posts for b in ordered]
+
+    return AnalysisResult(
+        company=get_filename(file_path),
+        df=None,
+        daily_scores=daily_scores,
+        common_words=pd.DataFrame(ngram_counter.most_common(1, 20), columns=['Word', 'Frequency']),
+        grams={
+            'bigrams': ngram_counter.most_common(2, 20),
+            'trigrams': ngram_counter.most_common(3, 20),
+        },
+        correlations=correlation.corr(),
+        export=exportDF,
+    )
@@ -0,0 +1,224 @@
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows has no getrusage; peak RSS is reported as null there
+    resource = None
+
+REPORT_VERSION = 1
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class StageStats:
+    """Totals for one (stage, subreddit) pair"""
+    __slots__ = ('stage', 'subreddit', 'calls', 'items', 'wall', 'cpu', 'peak_rss_mb')
+
+    def __init__(self, stage: str, subreddit: Optional[str]):
+        self.stage = stage
+        self.subreddit = subreddit
+        self.calls = 0
+        self.items = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_rss_mb = None
+
+    def add(self, calls: int, items: int, wall: float, cpu: float, rss: Optional[float]) -> None:
+        self.calls += calls
+        self.items += items
+        self.wall += wall
+        self.cpu += cpu
+        if rss is not None and (self.peak_rss_mb is None or rss > self.peak_rss_mb):
+            self.peak_rss_mb = rss
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.stage,
+            'subreddit': self.subreddit,
+            'calls': self.calls,
+            'items': self.items,
+            'wall_s': round(self.wall, 6),
+            'cpu_s': round(self.cpu, 6),
+            'peak_rss_mb': None if self.peak_rss_mb is None else round(self.peak_rss_mb, 1),
+        }
+
+
+class Recorder:
+    """Thread-safe collection of stage totals for one run (or one worker process).
+
+    CPU time is process CPU time, so for stages running on several threads at
+    once it includes the other threads' work; peak RSS is the process
+    high-water mark observed when the stage finished.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None):
+        self.profile_dir = profile_dir
+        self.stats: Dict[Tuple[str, Optional[str]], StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, subreddit: Optional[str], wall: float, cpu: float, items: int = 0,
+               calls: int = 1, rss: Optional[float] = None) -> None:
+        with self._lock:
+            stats = self.stats.get((stage, subreddit))
+            if stats is None:
+                stats = self.stats[(stage, subreddit)] = StageStats(stage, subreddit)
+            stats.add(calls, items, wall, cpu, rss)
+
+    def merge(self, stages: Iterable[Dict]) -> None:
+        """Fold in another recorder's snapshot, e.g. one returned by a worker process"""
+        for s in stages:
+            self.record(s['stage'], s['subreddit'], s['wall_s'], s['cpu_s'], s['items'], s['calls'],
+                        s['peak_rss_mb'])
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [s.to_dict() for s in self.stats.values()]
+
+
+_recorder: Optional[Recorder] = None
+
+
+def enable(profile_dir: Optional[str] = None) -> Recorder:
+    global _recorder
+    _recorder = Recorder(profile_dir)
+    return _recorder
+
+
+def disable() -> None:
+    global _recorder
+    _recorder = None
+
+
+def current() -> Optional[Recorder]:
+    return _recorder
+
+
+@contextmanager
+def recording(profile_dir: Optional[str] = None):
+    """Install a fresh recorder for the duration of the block, then restore the previous one"""
+    global _recorder
+    previous = _recorder
+    _recorder = Recorder(profile_dir)
+    try:
+        yield _recorder
+    finally:
+        _recorder = previous
+
+
+class Span:
+    """Times the code inside ``with``. Reusable: every exit adds one call.
+
+    ``items`` may be set inside the block; it goes back to its initial value
+    after each exit, so one span can wrap a hot loop body.
+    """
+    __slots__ = ('recorder', 'stage', 'subreddit', 'items', '_default_items', '_wall', '_cpu')
+
+    def __init__(self, recorder: Recorder, stage: str, subreddit: Optional[str], items: int):
+        self.recorder = recorder
+        self.stage = stage
+        self.subreddit = subreddit
+        self.items = items
+        self._default_items = items
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.record(self.stage, self.subreddit, time.perf_counter() - self._wall,
+                             time.process_time() - self._cpu, self.items, rss=peak_rss_mb())
+        self.items = self._default_items
+
+
+class _NullSpan:
+    __slots__ = ('items',)
+
+    def __init__(self, items: int = 0):
+        self.items = items
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+def stage(name: str, subreddit: Optional[str] = None, items: int = 0):
+    """Span for ``name`` in the current recorder; a no-op when instrumentation is off"""
+    recorder = _recorder
+    if recorder is None:
+        return _NullSpan(items)
+    return Span(recorder, name, subreddit, items)
+
+
+class Laps:
+    """Times consecutive sections of straight-line code: each ``lap`` records the
+    time since the previous one (or since creation) under its own stage name"""
+
+    def __init__(self, recorder: Optional[Recorder], subreddit: Optional[str] = None):
+        self.recorder = recorder
+        self.subreddit = subreddit
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def lap(self, name: str, items: int = 0) -> None:
+        if self.recorder is None:
+            return
+        wall, cpu = time.perf_counter(), time.process_time()
+        self.recorder.record(name, self.subreddit, wall - self._wall, cpu - self._cpu, items, rss=peak_rss_mb())
+        self._wall, self._cpu = wall, cpu
+
+
+def laps(subreddit: Optional[str] = None) -> Laps:
+    return Laps(_recorder, subreddit)
+
+
+@contextmanager
+def profile(name: str):
+    """cProfile the block into ``<profile_dir>/<name>.prof`` when the recorder has a profile_dir"""
+    recorder = _recorder
+    if recorder is None or not recorder.profile_dir:
+        yield
+        return
+    os.makedirs(recorder.profile_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(recorder.profile_dir, f"{name}.prof"))
+
+
+def write_report(path: str, stages: List[Dict], started_at: float, **metadata) -> None:
+    """Write the JSON run report: run metadata plus one entry per (stage, subreddit)"""
+    report = {
+        'version': REPORT_VERSION,
+        'started_at': datetime.fromtimestamp(started_at, tz=timezone.utc).isoformat(),
+        'wall_s': round(time.time() - started_at, 3),
+        'python': platform.python_version(),
+        'peak_rss_mb': peak_rss_mb(),
+        **metadata,
+        'stages': sorted(stages, key=lambda s: (s['subreddit'] or '', s['stage'])),
+    }
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,254 @@
+import argparse
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from praw.models import Submission
+
+from src.EDA.sentiment import get_analyzer
+from src.Preprocessing.preprocessor import clean_text, join_cleaned
+from src.Scraping.RequestScheduler import REQUEST_BACKOFF, MAX_BACKOFF, is_transient
+
+logger = logging.getLogger(__name__)
+
+# Rolling windows, in seconds: 1 hour, 24 hours and 3 days
+WINDOWS = {'1h': 3600, '24h': 86400, '3d': 259200}
+DEFAULT_CHECKPOINT_PATH = "data/monitor/checkpoint.json"
+CHECKPOINT_INTERVAL = 60.0  # seconds
+CHECKPOINT_VERSION = 1
+
+
+class SlidingWindow:
+    """Count and mean sentiment of the items created in the last ``seconds``.
+
+    Items are kept in a deque in arrival order with running sums, so adding
+    and expiring an item are both O(1). Streams deliver items roughly in
+    creation order, which is what expiry from the left relies on.
+    """
+    __slots__ = ('seconds', 'items', 'total')
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.items: Deque[Tuple[float, float, str]] = deque()  # (created_utc, score, item id)
+        self.total = 0.0
+
+    def add(self, created_utc: float, score: float, item_id: str, now: float) -> bool:
+        """Add an item; False if it is already outside the window (e.g. backlog replayed by a stream)"""
+        if created_utc < now - self.seconds:
+            return False
+        self.items.append((created_utc, score, item_id))
+        self.total += score
+        return True
+
+    def expire(self, now: float) -> List[str]:
+        cutoff = now - self.seconds
+        expired = []
+        while self.items and self.items[0][0] < cutoff:
+            _, score, item_id = self.items.popleft()
+            self.total -= score
+            expired.append(item_id)
+        if not self.items:
+            self.total = 0.0  # Drop accumulated rounding error whenever the window empties
+        return expired
+
+    @property
+    def count(self) -> int:
+        return len(self.items)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / len(self.items) if self.items else None
+
+
+class SentimentMonitor:
+    """Rolling sentiment per subreddit and item kind ('posts' or 'comments')"""
+
+    def __init__(self, windows: Dict[str, float] = WINDOWS):
+        self.windows = dict(windows)
+        self.series: Dict[Tuple[str, str], Dict[str, SlidingWindow]] = {}
+        # Ids still inside the longest window, so items a stream replays are counted once
+        self.seen: set = set()
+        self._longest = max(self.windows, key=self.windows.get)
+        self.analyzer = get_analyzer()
+
+    def _windows_for(self, subreddit: str, kind: str) -> Dict[str, SlidingWindow]:
+        key = (subreddit, kind)
+        if key not in self.series:
+            self.series[key] = {name: SlidingWindow(seconds) for name, seconds in self.windows.items()}
+        return self.series[key]
+
+    def score(self, text: str) -> float:
+        return self.analyzer.polarity_scores(text)['compound']
+
+    def observe(self, subreddit: str, kind: str, item_id: str, created_utc: float, text: str,
+                now: Optional[float] = None) -> Optional[float]:
+        """Score one item's cleaned ``text`` and add it to every window; None if already counted"""
+        if item_id in self.seen:
+            return None
+        now = time.time() if now is None else now
+        score = self.score(text)
+        self._add(self._windows_for(subreddit, kind), created_utc, score, item_id, now)
+        return score
+
+    def _add(self, windows: Dict[str, SlidingWindow], created_utc: float, score: float, item_id: str,
+             now: float) -> None:
+        for name, window in windows.items():
+            # Only ids the longest window holds are ever expired from ``seen``
+            if window.add(created_utc, score, item_id, now) and name == self._longest:
+                self.seen.add(item_id)
+
+    def observe_submission(self, submission, now: Optional[float] = None) -> Optional[float]:
+        # Same text preprocessing builds combined_text from
+        text = join_cleaned(clean_text(submission.title), clean_text(submission.selftext))
+        return self.observe(submission.subreddit.display_name, 'posts', submission.id,
+                            submission.created_utc, text, now)
+
+    def observe_comment(self, comment, now: Optional[float] = None) -> Optional[float]:
+        return self.observe(comment.subreddit.display_name, 'comments', comment.id,
+                            comment.created_utc, clean_text(comment.body), now)
+
+    def expire(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        for windows in self.series.values():
+            for name, window in windows.items():
+                expired = window.expire(now)
+                if name == self._longest:
+                    self.seen.difference_update(expired)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        """{subreddit: {kind: {window: {'count', 'avg_sentiment'}}}} as of ``now``"""
+        self.expire(now)
+        result: Dict = {}
+        for (subreddit, kind), windows in sorted(self.series.items()):
+            result.setdefault(subreddit, {})[kind] = {
+                name: {'count': window.count, 'avg_sentiment': window.mean} for name, window in windows.items()}
+        return result
+
+    def checkpoint(self, path: str, now: Optional[float] = None) -> None:
+        """Atomically write the current aggregates plus the window contents needed to resume"""
+        now = time.time() if now is None else now
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'updated_at': now,
+            'windows': self.windows,
+            'aggregates': self.snapshot(now),
+            # The longest window holds every item the shorter ones do
+            'items': {f"{subreddit}/{kind}": list(windows[self._longest].items)
+                      for (subreddit, kind), windows in self.series.items()},
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def restore(cls, path: str, windows: Dict[str, float] = WINDOWS) -> 'SentimentMonitor':
+        """Monitor rebuilt from a checkpoint (or empty if there is none usable)"""
+        monitor = cls(windows)
+        if not os.path.exists(path):
+            return monitor
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('version') != CHECKPOINT_VERSION:
+                return monitor
+            now = time.time()
+            for key, items in state['items'].items():
+                subreddit, kind = key.rsplit("/", 1)
+                series = monitor._windows_for(subreddit, kind)
+                for created_utc, score, item_id in items:
+                    monitor._add(series, created_utc, score, item_id, now)
+            monitor.expire(now)
+            logger.info("Restored monitor state from %s (%d items)", path, len(monitor.seen))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable monitor checkpoint %s: %s", path, e)
+            return cls(windows)
+        return monitor
+
+
+def follow(reddit, subreddits: Iterable[str], comments: bool = False):
+    """Yield new submissions (and comments) of ``subreddits`` as they appear, or None when idle.
+
+    Both PRAW streams are polled alternately on one thread (``pause_after=0``
+    hands control back as soon as a stream has nothing new).
+    """
+    multireddit = reddit.subreddit("+".join(subreddits))
+    streams = [multireddit.stream.submissions(pause_after=0)]
+    if comments:
+        streams.append(multireddit.stream.comments(pause_after=0))
+    while True:
+        for stream in streams:
+            for item in stream:
+                if item is None:
+                    break
+                yield item
+        yield None
+
+
+def run_monitor(scraper, subreddits: List[str], comments: bool = False,
+                checkpoint_path: str = DEFAULT_CHECKPOINT_PATH, checkpoint_interval: float = CHECKPOINT_INTERVAL,
+                idle_sleep: float = 1.0) -> None:
+    """Follow ``subreddits`` until interrupted, checkpointing every ``checkpoint_interval`` seconds.
+
+    Transient API failures restart the streams after a full-jitter backoff, as
+    ``RequestScheduler`` retries requests; the checkpoint is written once more on exit.
+    """
+    monitor = SentimentMonitor.restore(checkpoint_path)
+    last_checkpoint = time.time()
+    failures = 0
+    logger.info("📡 Monitoring r/%s (comments: %s)", "+".join(subreddits), comments)
+    try:
+        while True:
+            try:
+                for item in follow(scraper.reddit, subreddits, comments):
+                    if item is None:
+                        time.sleep(idle_sleep)
+                    elif isinstance(item, Submission):
+                        monitor.observe_submission(item)
+                    else:
+                        monitor.observe_comment(item)
+                    failures = 0
+                    if time.time() - last_checkpoint >= checkpoint_interval:
+                        monitor.checkpoint(checkpoint_path)
+                        last_checkpoint = time.time()
+                        logger.info("Checkpoint: %s", json.dumps(monitor.snapshot()))
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                delay = random.uniform(0, min(MAX_BACKOFF, REQUEST_BACKOFF * 2 ** failures))
+                failures += 1
+                logger.warning("Stream failed (%s), restarting in %.1fs", str(e), delay)
+                time.sleep(delay)
+    except KeyboardInterrupt:
+        logger.info("Monitor stopped")
+    finally:
+        monitor.checkpoint(checkpoint_path)
+
+
+def main():
+    from dotenv import dotenv_values  # type: ignore
+    from src.Scraping.RedditScraper import RedditScraper
+
+    parser = argparse.ArgumentParser(description="Follow subreddits live and keep rolling sentiment.")
+    parser.add_argument("subreddits", nargs="+")
+    parser.add_argument("--comments", action="store_true", help="Also follow new comments.")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH)
+    parser.add_argument("--interval", type=float, default=CHECKPOINT_INTERVAL,
+                        help="Seconds between checkpoints.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    config = dotenv_values(".env")
+    scraper = RedditScraper(client_id=config["CLIENT_ID"], client_secret=config["CLIENT_SECRET"],
+                            user_agent=config["USER_AGENT"])
+    run_monitor(scraper, args.subreddits, comments=args.comments, checkpoint_path=args.checkpoint,
+                checkpoint_interval=args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+# Typed records for the two post schemas that move through the pipeline:
+#   RawPost / RawComment              - what the scrapers emit (data/raw/*.jsonl, the post store)
+#   ProcessedPost / ProcessedComment  - what preprocessing writes (data/processed/*)
+# Slotted dataclasses carry no per-instance __dict__, so a post costs a fraction
+# of the equivalent dict. to_json()/from_json() convert at the file boundaries and
+# produce the exact key order of the existing files; columns() builds DataFrame or
+# Arrow columns straight from a list of records.
+
+
+@dataclass(slots=True)
+class RawComment:
+    author: str
+    body: str
+    score: int
+    created_utc: str            # ISO-8601 UTC with a trailing 'Z'
+
+    def to_json(self) -> Dict:
+        return {'author': self.author, 'body': self.body, 'score': self.score, 'created_utc': self.created_utc}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'RawComment':
+        return cls(data['author'], data['body'], data['score'], data['created_utc'])
+
+
+@dataclass(slots=True)
+class RawPost:
+    title: str
+    author: str
+    created_utc: str            # ISO-8601 UTC with offset; compares correctly as text
+    score: int
+    num_comments: int
+    awards: int
+    body: str
+    url: str
+    flair: Optional[str]
+    post_id: str
+    permalink: str
+    # Filled in once the batch has been deduplicated, when comments are requested
+    comments: List[RawComment] = field(default_factory=list)
+
+    def to_json(self) -> Dict:
+        return {
+            'title': self.title,
+            'author': self.author,
+            'created_utc': self.created_utc,
+            'score': self.score,
+            'num_comments': self.num_comments,
+            'awards': self.awards,
+            'body': self.body,
+            'url': self.url,
+            'flair': self.flair,
+            'post_id': self.post_id,
+            'permalink': self.permalink,
+            'comments': [c.to_json() for c in self.comments],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'RawPost':
+        # Older raw files may lack the optional fields
+        return cls(
+            data['title'], data.get('author', '[deleted]'), data['created_utc'], data['score'],
+            data['num_comments'], data.get('awards', 0), data.get('body', ''), data.get('url', ''),
+            data.get('flair'), data['post_id'], data.get('permalink', ''),
+            [RawComment.from_json(c) for c in data.get('comments', ())],
+        )
+
+
+@dataclass(slots=True)
+class ProcessedComment:
+    comment_body: str
+    comment_score: int
+    date: str                   # Date and time of the post the comment belongs to
+    time: str
+
+    def to_json(self) -> Dict:
+        return {'comment_body': self.comment_body, 'comment_score': self.comment_score,
+                'date': self.date, 'time': self.time}
+
+
+@dataclass(slots=True)
+class ProcessedPost:
+    post_id: str
+    title: str
+    date: str
+    time: str
+    score: int
+    num_comments: int
+    flair: Optional[str]
+    combined_text: str
+    comments: List[ProcessedComment] = field(default_factory=list)
+
+    def to_json(self) -> Dict:
+        return {
+            'post_id': self.post_id,
+            'title': self.title,
+            'date': self.date,
+            'time': self.time,
+            'score': self.score,
+            'num_comments': self.num_comments,
+            'flair': self.flair,
+            'combined_text': self.combined_text,
+            'comments': [c.to_json() for c in self.comments],
+        }
+
+
+Record = Union[RawComment, RawPost, ProcessedComment, ProcessedPost]
+
+
+def field_names(record_type: type) -> List[str]:
+    return [f.name for f in fields(record_type)]
+
+
+def columns(records: Sequence[Record], names: Optional[Iterable[str]] = None) -> Dict[str, list]:
+    """Column lists (e.g. for ``pd.DataFrame`` or ``pa.table``) of same-typed records.
+
+    Nested comment lists become lists of JSON dicts, the layout both the JSON
+    files and the Arrow struct columns use.
+    """
+    if names is None:
+        names = field_names(type(records[0])) if records else []
+    result = {}
+    for name in names:
+        if name == 'comments':
+            result[name] = [[c.to_json() for c in r.comments] for r in records]
+        else:
+            result[name] = [getattr(r, name) for r in records]
+    return result
@@ -0,0 +1,91 @@
+import logging
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, NamedTuple, Optional
+
+from src.Preprocessing import preprocessor
+from src.EDA import analysis
+from src.Pipeline import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class SubredditResult(NamedTuple):
+    raw_path: str
+    processed_path: Optional[str] = None
+    eda_path: Optional[str] = None
+    error: Optional[str] = None
+    stages: Optional[List[Dict]] = None   # Instrumentation snapshot, when enabled
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def run_subreddit(raw_path: str, backend: str = 'vader', plots: bool = True,
+                  processed_format: str = 'json', incremental: bool = False,
+                  chunk_size: Optional[int] = None, instrument: bool = False,
+                  profile_dir: Optional[str] = None, dedup: bool = False,
+                  ngram_capacity: Optional[int] = None, score_jobs: int = 1) -> SubredditResult:
+    """Run the preprocess -> analyze chain for one raw subreddit file.
+
+    Errors are returned rather than raised so one bad subreddit never takes
+    down the rest of a batch. With ``instrument`` the stage totals recorded
+    while running come back in ``stages`` (and a cProfile dump is written to
+    ``profile_dir`` when given), so they survive the trip from a worker process.
+    """
+    run = partial(_run_subreddit, raw_path, backend=backend, plots=plots, processed_format=processed_format,
+                  incremental=incremental, chunk_size=chunk_size, dedup=dedup, ngram_capacity=ngram_capacity,
+                  score_jobs=score_jobs)
+    if not instrument:
+        return run()
+    with instrumentation.recording(profile_dir) as recorder:
+        with instrumentation.profile(preprocessor.get_filename(raw_path)):
+            result = run()
+    return result._replace(stages=recorder.snapshot())
+
+
+def _run_subreddit(raw_path, backend, plots, processed_format, incremental, chunk_size, dedup,
+                   ngram_capacity, score_jobs) -> SubredditResult:
+    processed_path = None
+    try:
+        logger.info(f"Preprocessing data from {raw_path}")
+        processed_path = preprocessor.create_preprocessed_json_by_blocks_of_days(
+            raw_path, output_format=processed_format)
+        logger.info(f"Preprocessed data saved to {processed_path}")
+
+        eda_path = analysis.CompleteAnalysis(processed_path, backend=backend, jobs=score_jobs, plots=plots,
+                                             incremental=incremental, chunk_size=chunk_size, dedup=dedup,
+                                             ngram_capacity=ngram_capacity)
+        logger.info(f"EDA Completed and save to {eda_path}")
+        return SubredditResult(raw_path, processed_path, eda_path)
+    except Exception:
+        return SubredditResult(raw_path, processed_path, error=traceback.format_exc())
+
+
+def run_pipeline(raw_paths: List[str], jobs: int = 1, backend: str = 'vader',
+                 plots: bool = True, processed_format: str = 'json',
+                 incremental: bool = False, chunk_size: Optional[int] = None, instrument: bool = False,
+                 profile_dir: Optional[str] = None, dedup: bool = False,
+                 ngram_capacity: Optional[int] = None, score_jobs: int = 1) -> List[SubredditResult]:
+    """Process several raw files, each in its own worker process (up to ``jobs`` at once).
+
+    Results come back in the same order as ``raw_paths`` regardless of which
+    worker finishes first. ``jobs=1`` runs everything in the current process.
+    ``score_jobs`` is the number of processes each analysis scores sentiment with.
+    """
+    run = partial(run_subreddit, backend=backend, plots=plots, processed_format=processed_format,
+                  incremental=incremental, chunk_size=chunk_size, instrument=instrument,
+                  profile_dir=profile_dir, dedup=dedup, ngram_capacity=ngram_capacity,
+                  score_jobs=score_jobs)
+    if jobs <= 1 or len(raw_paths) <= 1:
+        results = [run(path) for path in raw_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(raw_paths))) as pool:
+            results = list(pool.map(run, raw_paths))
+
+    for result in results:
+        if not result.ok:
+            logger.error("Pipeline failed for %s:\n%s", result.raw_path, result.error)
+    return results
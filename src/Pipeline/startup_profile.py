@@ -0,0 +1,72 @@
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+# Modules whose cold import time we care about for short cron jobs
+DEFAULT_MODULES = [
+    "src.Preprocessing.preprocessor",
+    "src.EDA.analysis",
+    "src.Pipeline.runner",
+    "main",
+]
+
+# Heavy stacks the analysis should only load when it actually needs them
+DEFERRED_STACKS = ["matplotlib", "seaborn", "nltk", "vaderSentiment", "sklearn", "textblob", "afinn"]
+
+
+def profile_import(module: str, top: int = 10) -> Dict:
+    """Import ``module`` in a fresh interpreter under ``-X importtime`` and summarize it"""
+    probe = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps(sorted(m for m in {DEFERRED_STACKS!r} if m in sys.modules)))"
+    )
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", probe],
+                               capture_output=True, text=True, check=True)
+
+    # Lines look like: "import time:      self [us] |  cumulative | imported package"
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nesting is shown by two spaces of indentation per level after the separator
+        name = name[1:].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(cumulative_us)))
+
+    total_us = sum(cumulative for _, depth, cumulative in entries if depth == 0)
+    # Direct imports of the profiled module (or of the interpreter, for its own startup)
+    children = [e for e in entries if e[1] == 1]
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 1),
+        "modules_imported": len(entries),
+        "heavy_stacks_loaded": json.loads(completed.stdout.strip().splitlines()[-1]),
+        "slowest": [{"package": name, "cumulative_ms": round(cumulative / 1000, 1)}
+                    for name, _, cumulative in sorted(children, key=lambda e: e[2], reverse=True)[:top]],
+    }
+
+
+def startup_report(modules: List[str], top: int = 10) -> List[Dict]:
+    return [profile_import(module, top) for module in modules]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report cold-start import time of pipeline modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10, help="How many of the slowest imports to list.")
+    parser.add_argument("--output", help="Write the report as JSON to this path instead of stdout.")
+    args = parser.parse_args()
+
+    report = startup_report(args.modules, args.top)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,13 @@
 import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import re
 import os
 
+from src.Pipeline import instrumentation
+from src.Pipeline.records import ProcessedComment, ProcessedPost, RawPost, columns as record_columns
+
 def get_filename(path):
     return os.path.splitext(os.path.basename(path))[0]
 
@@ -14,92 +18,258 @@ def get_json_data(file_path):
     return data
 
 
+def iter_raw_posts(file_path):
+    # RawPost records; JSONL raw files are streamed line by line, legacy JSON arrays are still accepted
+    if file_path.endswith('.jsonl'):
+        with open(file_path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield RawPost.from_json(json.loads(line))
+    else:
+        for post in get_json_data(file_path):
+            yield RawPost.from_json(post)
+
+
+URL_PATTERN = re.compile(r'http\S+')
+# URLs and punctuation in one pass; URLs win because they are tried first
+URL_OR_PUNCT_PATTERN = re.compile(r'http\S+|[^\w\s]')
+# Every ASCII character that [^\w\s] matches, for str.translate on ASCII-only text
+ASCII_PUNCT_TABLE = {c: None for c in range(128) if re.match(r'[^\w\s]', chr(c))}
+ASCII_PUNCT_BYTES = bytes(ASCII_PUNCT_TABLE)
+# Batches of ASCII texts are cleaned as one bytes object, separated by this character.
+# It is whitespace to \s and str.split (so it ends URLs and is never punctuation) but not
+# to bytes regexes, which is why URL_PATTERN_BYTES excludes \x1c-\x1f explicitly.
+BATCH_SEPARATOR = '\x1e'
+URL_PATTERN_BYTES = re.compile(rb'http[^\s\x1c-\x1f]+')
+
+
 def clean_text(text):
+    # Same result as the original chain of passes:
+    #   lowercase -> remove http\S+ -> remove [^\w\s] -> collapse \s+ to ' ' -> strip
+    # str.split() uses the same whitespace class as \s, so split/join does the
+    # escape-character replacement, whitespace collapsing and stripping at once.
     text = text.lower()  # Lowercase
-    text = re.sub(r'http\S+', '', text)  # Remove URLs
-    text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
-    text = re.sub(r'[\n\r\t\f\v]', ' ', text)  # Remove escape characters (replace with space)
-    text = re.sub(r'\s+', ' ', text).strip()  # Normalize whitespace
-    return text
+    if text.isascii():
+        if 'http' in text:
+            text = URL_PATTERN.sub('', text)  # Remove URLs
+        text = text.translate(ASCII_PUNCT_TABLE)  # Remove punctuation
+    else:
+        text = URL_OR_PUNCT_PATTERN.sub('', text)  # Remove URLs and punctuation
+    return ' '.join(text.split())  # Normalize whitespace
+
+
+def _clean_ascii_batch(texts):
+    # clean_text of many ASCII texts: lowercase, URL and punctuation removal run once over
+    # the joined batch (bytes.lower/translate are far cheaper than per-string calls)
+    data = BATCH_SEPARATOR.join(texts).encode('ascii').lower()
+    if b'http' in data:
+        data = URL_PATTERN_BYTES.sub(b'', data)
+    data = data.translate(None, ASCII_PUNCT_BYTES).decode('ascii')
+    return [' '.join(text.split()) for text in data.split(BATCH_SEPARATOR)]
+
+
+def clean_texts(texts):
+    # Batch version of clean_text for lists or pandas Series (keeps the Series index).
+    # ASCII texts are cleaned together in one pass; anything else (or a text containing
+    # the batch separator) goes through clean_text. Output is identical to clean_text.
+    texts_list = list(texts)
+    cleaned = [None] * len(texts_list)
+    ascii_positions = []
+    for i, text in enumerate(texts_list):
+        if text.isascii() and BATCH_SEPARATOR not in text:
+            ascii_positions.append(i)
+        else:
+            cleaned[i] = clean_text(text)
+    if ascii_positions:
+        for i, text in zip(ascii_positions, _clean_ascii_batch([texts_list[i] for i in ascii_positions])):
+            cleaned[i] = text
+    if isinstance(texts, pd.Series):
+        return pd.Series(cleaned, index=texts.index, name=texts.name, dtype=object)
+    return cleaned
+
+
+def join_cleaned(*parts):
+    # clean_text(a + ' ' + b) == join_cleaned(clean_text(a), clean_text(b)), so a cleaned
+    # title can be reused for the combined text instead of cleaning it twice
+    return ' '.join(part for part in parts if part)
+
+
+# Width of each block of days in the processed output
+BLOCK_DAYS = 3
+# Posts whose texts are cleaned together; raw posts are still streamed, this many at a time
+CLEAN_BATCH_POSTS = 1000
+
+
+def to_utc_datetimes(created_utc):
+    # ISO-8601 strings (any offset) -> naive UTC datetime64[ns] array
+    return pd.to_datetime(pd.Series(created_utc, dtype=object), utc=True, format='ISO8601').values
+
+
+def assign_day_blocks(timestamps, block_days=BLOCK_DAYS):
+    # Block index for every UTC timestamp. Blocks are block_days-wide windows of epoch
+    # days, numbered from the earliest one present. Working on epoch days keeps month
+    # and year boundaries exact, and anchoring the windows to the epoch (not to the
+    # first post) keeps block boundaries stable as old posts leave the data.
+    epoch_blocks = np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64) // block_days
+    if len(epoch_blocks) == 0:
+        return epoch_blocks
+    return epoch_blocks - epoch_blocks.min()
+
+
+# Processed output formats: nested JSON blocks, or one typed row per post with a block_index column
+PROCESSED_FORMATS = ('json', 'parquet', 'feather')
 
 
-def create_preprocessed_json_by_blocks_of_days(file_path):
+def processed_schema():
+    import pyarrow as pa
+    comment = pa.struct([
+        ('comment_body', pa.string()),
+        ('comment_score', pa.int64()),
+        ('date', pa.string()),
+        ('time', pa.string()),
+    ])
+    return pa.schema([
+        ('post_id', pa.string()),
+        ('title', pa.string()),
+        ('date', pa.string()),
+        ('time', pa.string()),
+        ('score', pa.int64()),
+        ('num_comments', pa.int64()),
+        ('flair', pa.string()),
+        ('combined_text', pa.string()),
+        ('comments', pa.list_(comment)),
+        ('block_index', pa.int32()),
+    ])
+
+
+def write_processed_table(posts, block_index, processed_filepath, output_format):
+    # posts (ProcessedPost records) are already in time order; block_index is aligned with them
+    import pyarrow as pa
+    schema = processed_schema()
+    columns = record_columns(posts, [name for name in schema.names if name != 'block_index'])
+    columns['block_index'] = block_index
+    table = pa.table(columns, schema=schema)
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, processed_filepath)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, processed_filepath)
+
+
+def load_processed(file_path, columns=None):
+    # One row per post with a block_index column, whatever the processed format.
+    # Columnar files are read directly and only for the requested columns.
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path, columns=columns)
+    if file_path.endswith('.feather'):
+        return pd.read_feather(file_path, columns=columns)
+
+    with open(file_path, "r", encoding="utf-8") as file:
+        json_data = json.load(file)
+
+    # Columns are built straight from the parsed blocks, only for the requested
+    # fields; the posts themselves are never copied or tagged with their block
+    posts = [post for block in json_data for post in block]
+    names = [c for c in columns if c != 'block_index'] if columns is not None else list(posts[0]) if posts else []
+    data = {name: [post[name] for post in posts] for name in names}
+    data['block_index'] = np.repeat(np.arange(len(json_data), dtype=np.int64), [len(block) for block in json_data])
+    df = pd.DataFrame(data)
+    return df[columns] if columns is not None else df
+
+
+def create_preprocessed_json_by_blocks_of_days(file_path, block_days=BLOCK_DAYS, output_format='json'):
+    if output_format not in PROCESSED_FORMATS:
+        raise ValueError(f"Unknown processed format '{output_format}', expected one of {PROCESSED_FORMATS}")
     filename = get_filename(file_path)
-    data = get_json_data(file_path)
+    with instrumentation.stage('create_preprocessed_json_by_blocks_of_days', filename) as span:
+        processed_filepath, span.items = _preprocess_by_blocks_of_days(file_path, filename, block_days,
+                                                                       output_format)
+    return processed_filepath
 
-    #dictionary to store the posts and comments by blocks of days
-    posts_by_blocks_of_days = list()
-    # posts_by_blocks_of_days = {i: [] for i in range(0, 11)}  
 
-    current_day = -1
-    block_list = []
+def _preprocess_by_blocks_of_days(file_path, filename, block_days, output_format):
+    # Body of create_preprocessed_json_by_blocks_of_days; returns (path, posts kept)
+    data = iter_raw_posts(file_path)
+    # One reusable span around every clean_text call, so its total shows up separately
+    cleaning = instrumentation.stage('clean_text', filename)
+
     date_set = set()
+    parsed_posts = []
+    created_utc = []
+
+    def flush(pending):
+        # Clean the titles, bodies and comments of a batch of posts in one clean_texts call
+        if not pending:
+            return
+        with cleaning:
+            texts = [text for post, _, _ in pending
+                     for text in (post.title, post.body, *(comment.body for comment in post.comments))]
+            cleaned = iter(clean_texts(texts))
+            cleaning.items = len(texts)
+        for post, date_part, time_part in pending:
+            title = next(cleaned)
+            body = next(cleaned)
+            post_data = ProcessedPost(
+                post_id=post.post_id,
+                title=title,
+                date=date_part,
+                time=time_part,
+                score=post.score,
+                num_comments=post.num_comments,
+                flair=post.flair,
+                combined_text=join_cleaned(title, body),
+            )
+            post_data.comments = [ProcessedComment(next(cleaned), comment.score, date_part, time_part)
+                                  for comment in post.comments]
+            parsed_posts.append(post_data)
+            created_utc.append(post.created_utc)
+        pending.clear()
 
+    pending = []
     for post in data:
 
         # Skip if the post has no body
-        body = post.get('body', '')
-        if not body.strip():         
+        if not post.body.strip():
             continue
         
         # Spliting into date and time
-        created_utc_str = post['created_utc']
-        dt = datetime.fromisoformat(created_utc_str)
+        dt = datetime.fromisoformat(post.created_utc)
         date_part = dt.date().isoformat() 
         time_part = dt.time().isoformat()
-        day_part = dt.day
-        month_part = dt.month
 
         date_set.add(date_part)
 
-        day_of_year = month_part * 31 + day_part
-        if current_day == -1:
-            current_day = day_of_year
-        
-        if day_of_year > current_day + 2:
-            current_day = day_of_year
-            posts_by_blocks_of_days.append(block_list)
-            block_list = []
-
-        # print (f"Current day: {current_day}, Post day: {day_part}, Block list length: {len(block_list)}")
-
-        post_data = {
-            'post_id': post['post_id'],
-            # 'author': post['author'],
-            # 'url': post['url'],
-            # 'created_utc': created_utc_str,
-            'title': clean_text(post['title']),
-            'date' : date_part,
-            'time' : time_part,
-            'score': post['score'],
-            'num_comments': post['num_comments'],
-            'flair': post['flair'],
-            # 'body': clean_text(post.get('body', '')), 
-            'combined_text': clean_text(post['title'] + ' ' + post.get('body', '')),
-            'comments': []
-        }
-
-        for comment in post["comments"]:
-            comment_data = {
-                # 'post_id': post['post_id'],
-                # 'comment_author': comment['author'],
-                # 'comment_created_utc': comment['created_utc']
-                'comment_body': clean_text(comment['body']),
-                'comment_score': comment['score'],
-                'date' : date_part,
-                'time' : time_part
-            }
-            post_data['comments'].append(comment_data)
-        
-        block_list.append(post_data)
+        pending.append((post, date_part, time_part))
+        if len(pending) >= CLEAN_BATCH_POSTS:
+            flush(pending)
+    flush(pending)
+
+    # Raw JSONL files are written in arrival order, so bucket on the timestamps
+    # themselves. Blocks with no posts stay as empty lists, so consecutive block
+    # indices are always block_days apart.
+    timestamps = to_utc_datetimes(created_utc)
+    block_index = assign_day_blocks(timestamps, block_days)
+    order = np.argsort(timestamps, kind='stable')
 
     # print(date_set, len(date_set))
 
     # Save the preprocessed data
     processed_dir = f'data/processed/'
     os.makedirs(processed_dir, exist_ok=True)
-    processed_filepath = os.path.join(processed_dir, f'{filename}.json')
+    processed_filepath = os.path.join(processed_dir, f'{filename}.{output_format}')
+
+    if output_format != 'json':
+        write_processed_table([parsed_posts[i] for i in order], block_index[order],
+                              processed_filepath, output_format)
+        return processed_filepath, len(parsed_posts)
+
+    #list to store the posts and comments by blocks of days
+    posts_by_blocks_of_days = [[] for _ in range(int(block_index.max()) + 1 if len(block_index) else 0)]
+    for i in order:
+        posts_by_blocks_of_days[block_index[i]].append(parsed_posts[i].to_json())
+
     with open(processed_filepath, 'w') as f:
         json.dump(posts_by_blocks_of_days, f, indent=2)
-    return processed_filepath
+    return processed_filepath, len(parsed_posts)
 
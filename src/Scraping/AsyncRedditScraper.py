@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from src.Scraping.collection import (DEFAULT_MAX_CONCURRENCY, LISTING_PAGE_SIZE, SORT_METHODS, JsonlWriter,
+                                     filter_batches, raw_filename)
+from src.Scraping.RequestScheduler import RequestScheduler
+from src.Pipeline.records import RawComment, RawPost
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://oauth.reddit.com"
+DEFAULT_AUTH_URL = "https://www.reddit.com/api/v1/access_token"
+REQUEST_TIMEOUT = 30.0  # seconds
+# Refresh the OAuth token this long before Reddit says it expires
+TOKEN_EXPIRY_MARGIN = 60.0
+
+
+class RedditHttpError(Exception):
+    """Non-2xx response (or a failed connection, with status None) from the Reddit API"""
+
+    def __init__(self, status: Optional[int], message: str, retry_after: Optional[str] = None,
+                 transient: Optional[bool] = None):
+        super().__init__(f"HTTP {status}: {message}" if status else message)
+        self.status = status
+        self.retry_after = retry_after
+        # Read by RequestScheduler: 429s, server errors and connection failures are retried
+        if transient is None:
+            transient = status is None or status == 429 or status >= 500
+        self.transient = transient
+
+
+class RedditHttpClient:
+    """Minimal Reddit API client on one pooled ``aiohttp`` session.
+
+    Authenticates with the OAuth client-credentials grant (app-only, read access),
+    tracks the rate-limit headers in ``limits`` (same keys as PRAW's
+    ``reddit.auth.limits``), and caps open connections at ``max_connections``.
+    ``base_url`` and ``auth_url`` can point at a local stand-in.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, user_agent: str,
+                 max_connections: int = DEFAULT_MAX_CONCURRENCY, base_url: str = DEFAULT_BASE_URL,
+                 auth_url: str = DEFAULT_AUTH_URL):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.user_agent = user_agent
+        self.max_connections = max_connections
+        self.base_url = base_url.rstrip("/")
+        self.auth_url = auth_url
+        self.limits: Dict = {'remaining': None, 'reset_timestamp': None, 'used': None}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._token_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            headers={'User-Agent': self.user_agent})
+        self._token_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+        self._session = None
+
+    async def _authorization(self) -> str:
+        async with self._token_lock:
+            if self._token is None or time.time() >= self._token_expires:
+                try:
+                    async with self._session.post(
+                            self.auth_url, data={'grant_type': 'client_credentials'},
+                            auth=aiohttp.BasicAuth(self.client_id, self.client_secret)) as response:
+                        if response.status != 200:
+                            raise RedditHttpError(response.status, "OAuth token request failed")
+                        token = await response.json()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    raise RedditHttpError(None, f"OAuth token request failed: {e!r}") from e
+                self._token = token['access_token']
+                self._token_expires = time.time() + float(token.get('expires_in', 3600)) - TOKEN_EXPIRY_MARGIN
+        return f"bearer {self._token}"
+
+    def _update_limits(self, headers) -> None:
+        # x-ratelimit-reset is in seconds from now
+        if 'x-ratelimit-remaining' in headers:
+            self.limits = {
+                'remaining': float(headers['x-ratelimit-remaining']),
+                'reset_timestamp': time.time() + float(headers.get('x-ratelimit-reset', 0)),
+                'used': int(float(headers.get('x-ratelimit-used', 0))),
+            }
+
+    async def get_json(self, path: str, params: Optional[Dict] = None):
+        headers = {'Authorization': await self._authorization()}
+        # raw_json=1 returns text without HTML entity escaping, as PRAW requests it
+        query = {'raw_json': 1, **(params or {})}
+        try:
+            async with self._session.get(f"{self.base_url}{path}", params=query, headers=headers) as response:
+                self._update_limits(response.headers)
+                if response.status == 401:
+                    self._token = None  # Expired early; the retry fetches a new one
+                    raise RedditHttpError(401, "Unauthorized", retry_after="0", transient=True)
+                if response.status != 200:
+                    raise RedditHttpError(response.status, response.reason or "",
+                                          response.headers.get('retry-after'))
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise RedditHttpError(None, f"{path}: {e!r}") from e
+
+
+def transform_post(data: Dict) -> RawPost:
+    """Listing child data -> the same record ``RedditScraper._transform_post`` builds"""
+    return RawPost(
+        title=data['title'],
+        author=data.get('author') or '[deleted]',
+        created_utc=datetime.fromtimestamp(data['created_utc'], tz=timezone.utc).isoformat(),
+        score=data['score'],
+        num_comments=data['num_comments'],
+        awards=data.get('total_awards_received', 0),
+        body=data.get('selftext', ''),
+        url=data['url'],
+        flair=data.get('link_flair_text'),
+        post_id=data['id'],
+        permalink=f"https://www.reddit.com{data['permalink']}",
+    )
+
+
+def transform_comment(data: Dict) -> RawComment:
+    return RawComment(
+        author=data.get('author') or '[deleted]',
+        body=data['body'],
+        score=data['score'],
+        created_utc=datetime.utcfromtimestamp(data['created_utc']).isoformat() + 'Z'
+    )
+
+
+class AsyncRedditScraper:
+    """asyncio counterpart of ``RedditScraper`` with the same ``collect_posts`` contract.
+
+    One event loop drives every listing and comment request over a shared
+    connection pool, so many subreddits are collected concurrently without a
+    thread per request. Posts are filtered, deduplicated and written exactly
+    like the synchronous scraper's. Use as ``async with``, or call the methods
+    directly and a client is opened for each call.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, user_agent: str, get_comments: bool = False,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, base_url: str = DEFAULT_BASE_URL,
+                 auth_url: str = DEFAULT_AUTH_URL, scheduler: Optional[RequestScheduler] = None):
+        self.get_comments = get_comments
+        self.max_concurrency = max_concurrency
+        self.client = RedditHttpClient(client_id, client_secret, user_agent, max_concurrency, base_url, auth_url)
+        self.scheduler = scheduler or RequestScheduler(limits=lambda: self.client.limits,
+                                                       max_concurrency=max_concurrency)
+        self.stage_timings: Dict[str, Dict[str, float]] = {}
+        self._open = False
+
+    async def __aenter__(self):
+        await self.client.__aenter__()
+        self._open = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._open = False
+        await self.client.__aexit__(exc_type, exc, tb)
+
+    async def collect_posts(self, subreddit_name: str, count: int) -> Tuple[List[RawPost], str]:
+        """Collect recent posts from a subreddit with deduplication"""
+        if not self._open:
+            async with self:
+                return await self.collect_posts(subreddit_name, count)
+
+        logger.info("🚀 Starting collection for r/%s (target: %d posts)", subreddit_name, count)
+        start_time = time.time()
+        batches = list(zip(SORT_METHODS, await asyncio.gather(
+            *(self._fetch_sort_method(subreddit_name, sort_method, count) for sort_method in SORT_METHODS))))
+        with JsonlWriter(raw_filename(subreddit_name)) as writer:
+            collected_posts = await self._merge_batches(subreddit_name, batches, start_time, writer)
+        return collected_posts, writer.filename
+
+    async def collect_many(self, subreddits: List[str], count: int) -> List[Tuple[List[RawPost], str]]:
+        """Collect several subreddits concurrently, returning results in input order"""
+        if not self._open:
+            async with self:
+                return await self.collect_many(subreddits, count)
+        return list(await asyncio.gather(*(self.collect_posts(name, count) for name in subreddits)))
+
+    async def _fetch_sort_method(self, subreddit_name: str, sort_method: str,
+                                 count: int) -> Optional[Tuple[List[RawPost], float]]:
+        try:
+            batch_start = time.time()
+            logger.info("🔍 Processing '%s' sort method for r/%s...", sort_method, subreddit_name)
+            time_filter = 'month' if sort_method in ('top', 'controversial') else None
+            posts = await self._fetch_batch(subreddit_name, sort_method, count * 2, time_filter)
+            logger.debug("Retrieved %d posts from '%s' method", len(posts), sort_method)
+            return posts, time.time() - batch_start
+        except Exception as e:
+            logger.error("❌ Failed %s method: %s", sort_method, str(e), exc_info=True)
+            return None
+
+    async def _fetch_batch(self, subreddit_name: str, sort_method: str, limit: int,
+                           time_filter: Optional[str] = None) -> List[RawPost]:
+        """Page through a listing (100 posts per request) until ``limit`` posts or its end"""
+        posts = []
+        after = None
+        while len(posts) < limit:
+            params = {'limit': min(LISTING_PAGE_SIZE, limit - len(posts))}
+            if time_filter:
+                params['t'] = time_filter
+            if after:
+                params['after'] = after
+            listing = await self.scheduler.call_async(
+                self.client.get_json, f"/r/{subreddit_name}/{sort_method}", params,
+                description=f"r/{subreddit_name} '{sort_method}' listing")
+            children = listing['data']['children']
+            posts.extend(transform_post(child['data']) for child in children if child['kind'] == 't3')
+            after = listing['data'].get('after')
+            if not children or not after:
+                break
+        return posts
+
+    async def _merge_batches(self, subreddit_name: str, batches, start_time: float,
+                             writer: Optional[JsonlWriter] = None) -> List[RawPost]:
+        collected_posts = []
+        timings = {'fetch': 0.0, 'filter': 0.0, 'comments': 0.0}
+        for batch_posts in filter_batches(subreddit_name, batches, start_time, collected_posts, timings=timings):
+            # Comments are fetched only for posts that survived dedup and the expiry filter
+            if self.get_comments and batch_posts:
+                comments_start = time.time()
+                logger.info("💬 Fetching top comments for %d posts", len(batch_posts))
+                comments = await asyncio.gather(*(self._fetch_top_comments(p.post_id) for p in batch_posts))
+                for post, post_comments in zip(batch_posts, comments):
+                    post.comments = post_comments
+                timings['comments'] += time.time() - comments_start
+            if writer is not None:
+                writer.write(batch_posts)
+        self.stage_timings[subreddit_name] = timings
+        return collected_posts
+
+    async def _fetch_top_comments(self, post_id: str, limit: int = 3) -> List[RawComment]:
+        try:
+            _, comment_listing = await self.scheduler.call_async(
+                self.client.get_json, f"/comments/{post_id}", {'sort': 'top', 'limit': limit * 2},
+                description=f"Comment fetch for post {post_id}")
+        except Exception as e:
+            logger.error("Failed to fetch comments for post %s: %s", post_id, str(e), exc_info=True)
+            return []
+        # Skip "more" stubs and removed comments, like the synchronous scraper
+        valid = [child['data'] for child in comment_listing['data']['children']
+                 if child['kind'] == 't1' and child['data']['body'] != '[removed]']
+        return [transform_comment(c) for c in valid[:limit]]
@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+from src.Pipeline.records import RawPost
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = "data/store/posts.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    post_id      TEXT PRIMARY KEY,
+    subreddit    TEXT NOT NULL,
+    created_utc  TEXT NOT NULL,
+    score        INTEGER,
+    num_comments INTEGER,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_by_subreddit ON posts (subreddit, created_utc);
+CREATE TABLE IF NOT EXISTS high_water_marks (
+    subreddit    TEXT NOT NULL,
+    sort_method  TEXT NOT NULL,
+    created_utc  TEXT NOT NULL,
+    PRIMARY KEY (subreddit, sort_method)
+);
+"""
+
+
+class PostStore:
+    """SQLite-backed store of scraped posts keyed by post_id.
+
+    Alongside the posts it keeps, per subreddit and sort method, the newest
+    ``created_utc`` seen so far, so incremental runs only need to fetch what is newer.
+    ``created_utc`` values are the ISO-8601 UTC strings produced by
+    ``RedditScraper._transform_post`` and therefore compare correctly as text.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The scraper writes from worker threads; serialize access to the connection
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        logger.debug("Opened post store at %s", path)
+
+    def upsert_posts(self, subreddit_name: str, posts: List[RawPost]) -> None:
+        """Insert new posts or replace stored ones with fresher copies"""
+        rows = [(p.post_id, subreddit_name, p.created_utc, p.score, p.num_comments,
+                 json.dumps(p.to_json(), ensure_ascii=False)) for p in posts]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO posts (post_id, subreddit, created_utc, score, num_comments, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def update_stats(self, stats: List[Tuple[str, int, int]]) -> int:
+        """Refresh (post_id, score, num_comments) of stored posts, returning the number updated"""
+        updated = 0
+        with self._lock, self._conn:
+            for post_id, score, num_comments in stats:
+                row = self._conn.execute("SELECT data FROM posts WHERE post_id = ?", (post_id,)).fetchone()
+                if row is None:
+                    continue
+                data = json.loads(row[0])
+                data['score'] = score
+                data['num_comments'] = num_comments
+                self._conn.execute(
+                    "UPDATE posts SET score = ?, num_comments = ?, data = ? WHERE post_id = ?",
+                    (score, num_comments, json.dumps(data, ensure_ascii=False), post_id))
+                updated += 1
+        return updated
+
+    def evict_expired(self, subreddit_name: str, cutoff_utc: str) -> int:
+        """Delete posts created before ``cutoff_utc``, returning how many were removed"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM posts WHERE subreddit = ? AND created_utc < ?", (subreddit_name, cutoff_utc))
+        return cursor.rowcount
+
+    def post_ids(self, subreddit_name: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT post_id FROM posts WHERE subreddit = ? ORDER BY created_utc", (subreddit_name,)).fetchall()
+        return [r[0] for r in rows]
+
+    def iter_posts(self, subreddit_name: str) -> Iterator[RawPost]:
+        """Yield the stored posts of a subreddit, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM posts WHERE subreddit = ? ORDER BY created_utc", (subreddit_name,)).fetchall()
+        for (data,) in rows:
+            yield RawPost.from_json(json.loads(data))
+
+    def get_high_water_mark(self, subreddit_name: str, sort_method: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_utc FROM high_water_marks WHERE subreddit = ? AND sort_method = ?",
+                (subreddit_name, sort_method)).fetchone()
+        return row[0] if row else None
+
+    def set_high_water_mark(self, subreddit_name: str, sort_method: str, created_utc: str) -> None:
+        """Advance the high-water mark; older values never move it backwards"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO high_water_marks (subreddit, sort_method, created_utc) VALUES (?, ?, ?) "
+                "ON CONFLICT (subreddit, sort_method) DO UPDATE SET created_utc = excluded.created_utc "
+                "WHERE excluded.created_utc > high_water_marks.created_utc",
+                (subreddit_name, sort_method, created_utc))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
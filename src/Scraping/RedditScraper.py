@@ -1,27 +1,26 @@
-import json
 import logging
+import math
 from datetime import datetime, timedelta, timezone
-import sys
-from typing import Tuple, List, Dict
-import os
+from typing import Tuple, List, Dict, Optional
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import praw
 
-logging.basicConfig(
-    level=logging.INFO,
-    # format='%(asctime)s - %(levelname)s - %(message)s',
-    format='%(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        # logging.FileHandler('reddit_scraper.log')
-    ]
-)
+from src.Scraping.PostStore import PostStore
+from src.Scraping.collection import (DEFAULT_MAX_CONCURRENCY, LISTING_PAGE_SIZE, SORT_METHODS, JsonlWriter,
+                                     filter_batches, raw_filename)
+from src.Scraping.RequestScheduler import RequestScheduler
+from src.Pipeline import instrumentation
+from src.Pipeline.records import RawComment, RawPost
+
 logger = logging.getLogger(__name__)
 
 
 class RedditScraper:
-    def __init__(self, client_id: str, client_secret: str, user_agent: str, get_comments: bool = False):
+    def __init__(self, client_id: str, client_secret: str, user_agent: str, get_comments: bool = False,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, store: Optional[PostStore] = None,
+                 scheduler: Optional[RequestScheduler] = None):
         self.reddit = praw.Reddit(
             client_id=client_id,
             client_secret=client_secret,
@@ -29,6 +28,15 @@ class RedditScraper:
             check_for_async=False
         )
         self.get_comments = get_comments
+        self.max_concurrency = max_concurrency
+        # Paces, caps and retries every request against the client's rate-limit budget.
+        # Pass one scheduler to several scrapers that share the same credentials.
+        self.scheduler = scheduler or RequestScheduler(limits=lambda: self.reddit.auth.limits,
+                                                       max_concurrency=max_concurrency)
+        # Per-subreddit stage timings (seconds) from the most recent collection
+        self.stage_timings: Dict[str, Dict[str, float]] = {}
+        # Optional persistent store used by collect_incremental
+        self.store = store
         logger.debug(
             "Initializing RedditScraper with client ID: %s...%s, User-Agent: %s, Comments enabled: %s",
             client_id[:2], client_id[-2:],  # Obscure full client ID in logs
@@ -36,198 +44,286 @@ class RedditScraper:
             get_comments
         )
 
-    def collect_posts(self, subreddit_name: str, count: int) -> Tuple[List[Dict], str]:
+    def collect_posts(self, subreddit_name: str, count: int) -> Tuple[List[RawPost], str]:
         """Collect recent posts from a subreddit with deduplication"""
         logger.info("🚀 Starting collection for r/%s (target: %d posts)", subreddit_name, count)
         start_time = time.time()
-        collected_posts = []
-        seen_ids = set()
-        start_date = datetime.now(timezone.utc) - timedelta(days=30)
-
-        logger.debug("Filtering posts newer than %s (UTC)", start_date.isoformat())
-
-        sort_methods = [
-                        # 'hot',
-                        # 'new',
-                        'top',
-                        # 'rising',
-                        'controversial'
-                        ]
-        total_processed = 0
-        total_duplicates = 0
-        total_expired = 0
-
-        for sort_method in sort_methods:
-            try:
-                batch_start = time.time()
-                logger.info("🔍 Processing '%s' sort method...", sort_method)
-
-                time_filter = 'month' if sort_method in ('top', 'controversial') else None
-                posts = self._fetch_batch(subreddit_name, sort_method, count * 2, time_filter)
-
-                logger.debug("Retrieved %d posts from '%s' method", len(posts), sort_method)
-                batch_duplicates = 0
-                batch_expired = 0
-
-                for post in posts:
-                    total_processed += 1
-                    post_date = datetime.fromisoformat(post['created_utc'])
-
-                    if post_date < start_date:
-                        batch_expired += 1
-                        logger.debug("Skipping expired post ID %s (created: %s)",
-                                     post['post_id'], post_date.isoformat())
-                        continue
-
-                    if post['post_id'] in seen_ids:
-                        batch_duplicates += 1
-                        logger.debug("Duplicate post ID %s found", post['post_id'])
-                        continue
-
-                    seen_ids.add(post['post_id'])
-                    collected_posts.append(post)
-                    logger.debug("✅ Added post ID %s (Score: %d, Comments: %d)",
-                                 post['post_id'], post['score'], post['num_comments'])
-
-                total_duplicates += batch_duplicates
-                total_expired += batch_expired
-                logger.info((
-                    "🏁 Batch complete: %d new, %d duplicates, %d expired "
-                    "(%.2fs) | Total: %d"
-                ), len(posts) - batch_duplicates - batch_expired,
-                    batch_duplicates, batch_expired,
-                   time.time() - batch_start, len(collected_posts))
-
-            except Exception as e:
-                logger.error("❌ Failed %s method: %s", sort_method, str(e), exc_info=True)
-                continue
-
-        logger.info((
-            "📊 Collection complete for r/%s\n"
-            "Total processed: %d | Valid: %d | Duplicates: %d | Expired: %d\n"
-            "Elapsed time: %.2fs"
-        ), subreddit_name, total_processed, len(collected_posts),
-            total_duplicates, total_expired, time.time() - start_time)
-
-        return self._format_flattened(collected_posts, subreddit_name)
-
-    def _fetch_batch(self, subreddit_name: str, sort_method: str, limit: int, time_filter: str = None) -> List[Dict]:
-        """Fetch a batch of posts using specified sorting method"""
-        logger.debug("Fetching batch: sub=%s, sort=%s, limit=%d, time_filter=%s",
-                     subreddit_name, sort_method, limit, time_filter)
+        batches = [(sort_method, self._fetch_sort_method(subreddit_name, sort_method, count))
+                   for sort_method in SORT_METHODS]
+        with JsonlWriter(raw_filename(subreddit_name)) as writer:
+            collected_posts = self._merge_batches(subreddit_name, batches, start_time, writer=writer)
+        return collected_posts, writer.filename
+
+    def collect_many(self, subreddits: List[str], count: int,
+                     max_workers: Optional[int] = None) -> List[Tuple[List[RawPost], str]]:
+        """Collect several subreddits at once, fetching every (subreddit, sort method) pair in parallel.
+
+        Results are merged in the same order as the serial path, so the returned posts
+        and dedup counters match calling ``collect_posts`` for each subreddit in turn.
+        """
+        max_workers = max_workers or self.max_concurrency
+        logger.info("🚀 Starting collection for %d subreddits (target: %d posts, workers: %d)",
+                    len(subreddits), count, max_workers)
+        start_time = time.time()
 
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reddit-fetch") as pool:
+            futures = {
+                (subreddit_name, sort_method): pool.submit(
+                    self._fetch_sort_method, subreddit_name, sort_method, count)
+                for subreddit_name in subreddits
+                for sort_method in SORT_METHODS
+            }
+            results = []
+            for subreddit_name in subreddits:
+                batches = [(sort_method, futures[(subreddit_name, sort_method)].result())
+                           for sort_method in SORT_METHODS]
+                with JsonlWriter(raw_filename(subreddit_name)) as writer:
+                    collected_posts = self._merge_batches(subreddit_name, batches, start_time, writer=writer)
+                results.append((collected_posts, writer.filename))
+
+        return results
+
+    def collect_incremental(self, subreddit_name: str, count: int) -> Tuple[List[RawPost], str]:
+        """Collect only what changed since the last run, using the persistent post store.
+
+        The first run for a subreddit fetches the full 30-day window (plus the 'new'
+        listing to seed its high-water mark). Later runs walk the 'new' listing only
+        down to the stored high-water mark, refresh score/num_comments of the posts
+        still inside the window, and evict the ones that have expired.
+        """
+        if self.store is None:
+            raise ValueError("collect_incremental requires a PostStore (pass store=... to RedditScraper)")
+
+        logger.info("🚀 Starting incremental collection for r/%s", subreddit_name)
+        start_time = time.time()
+        window_start = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+        watermark = self.store.get_high_water_mark(subreddit_name, 'new')
+
+        if watermark is None:
+            logger.info("No high-water mark for r/%s, fetching the full window", subreddit_name)
+            batches = [(sort_method, self._fetch_sort_method(subreddit_name, sort_method, count))
+                       for sort_method in SORT_METHODS + ['new']]
+        else:
+            logger.info("Fetching r/%s posts newer than %s", subreddit_name, watermark)
+            batches = [('new', self._fetch_new_since(subreddit_name, watermark))]
+
+        known_ids = set(self.store.post_ids(subreddit_name))
+        new_posts = self._merge_batches(subreddit_name, batches, start_time, seen_ids=set(known_ids))
+        self.store.upsert_posts(subreddit_name, new_posts)
+        for sort_method, fetched in batches:
+            if fetched and fetched[0]:
+                self.store.set_high_water_mark(
+                    subreddit_name, sort_method, max(p.created_utc for p in fetched[0]))
+
+        # Evict first so no rate-limited requests are spent on posts about to be dropped;
+        # posts added by this run were just fetched and need no refresh either
+        evicted = self.store.evict_expired(subreddit_name, window_start)
+        refreshed = self._refresh_stats(
+            subreddit_name, [post_id for post_id in self.store.post_ids(subreddit_name) if post_id in known_ids])
+        logger.info("📊 Incremental update for r/%s: %d new | %d refreshed | %d evicted (%.2fs)",
+                    subreddit_name, len(new_posts), refreshed, evicted, time.time() - start_time)
+
+        stored_posts = list(self.store.iter_posts(subreddit_name))
+        with JsonlWriter(raw_filename(subreddit_name)) as writer:
+            writer.write(stored_posts)
+        return stored_posts, writer.filename
+
+    def _fetch_new_since(self, subreddit_name: str, watermark: str) -> Optional[Tuple[List[RawPost], float]]:
+        """Walk the 'new' listing until reaching posts at or before the high-water mark"""
         try:
-            subreddit = self.reddit.subreddit(subreddit_name)
-            # method = getattr(subreddit, sort_method, None)
-            #
-            # if not method:
-            #     logger.warning("Invalid sort method '%s' for subreddit %s",
-            #                    sort_method, subreddit_name)
-            #     return []
-            #
-            # params = {'limit': limit}
-            # if time_filter and hasattr(method, 'time_filter'):
-            #     params['time_filter'] = time_filter
-            if sort_method == 'top':
-                posts = list(subreddit.top(time_filter=time_filter, limit=limit))
-            elif sort_method == 'controversial':
-                posts = list(subreddit.controversial(time_filter=time_filter, limit=limit))
-            elif sort_method == 'hot':
-                posts = list(subreddit.hot(limit=limit))
-            elif sort_method == 'new':
-                posts = list(subreddit.new(limit=limit))
-            else:
-                raise Exception(f"Invalid sort method: {sort_method}")
-
-            # logger.debug("Executing API request with params: %s", params)
-            logger.debug("Received %d raw posts", len(posts))
-
-            return [self._transform_post(p) for p in posts]
+            batch_start = time.time()
+            watermark_ts = datetime.fromisoformat(watermark).timestamp()
+
+            def list_page(after: Optional[str]) -> List:
+                # One listing request: the page of posts following ``after`` (a fullname)
+                return list(self.reddit.subreddit(subreddit_name).new(
+                    limit=LISTING_PAGE_SIZE, params={'after': after} if after else {}))
+
+            # Page by page, so every request is charged to the scheduler as it is made
+            fresh, after = [], None
+            while True:
+                page = self.scheduler.call(list_page, after, description=f"r/{subreddit_name} new listing")
+                older = next((i for i, s in enumerate(page) if s.created_utc <= watermark_ts), None)
+                fresh.extend(page if older is None else page[:older])
+                if older is not None or len(page) < LISTING_PAGE_SIZE:
+                    break
+                after = f"t3_{page[-1].id}"
+
+            logger.debug("Retrieved %d posts newer than %s", len(fresh), watermark)
+            return self._transform_posts(fresh), time.time() - batch_start
+        except Exception as e:
+            logger.error("❌ Failed to fetch new posts for r/%s: %s", subreddit_name, str(e), exc_info=True)
+            return None
 
-        except praw.exceptions.APIException as api_error:
-            logger.error("API Error: %s (HTTP %d)", api_error.message, api_error.error_type)
-            return []
+    def _refresh_stats(self, subreddit_name: str, post_ids: List[str]) -> int:
+        """Re-read score and num_comments for stored posts (100 ids per request)"""
+        if not post_ids:
+            return 0
+        try:
+            fullnames = [f"t3_{post_id}" for post_id in post_ids]
+            stats = self.scheduler.call(
+                lambda: [(s.id, s.score, s.num_comments) for s in self.reddit.info(fullnames=fullnames)],
+                cost=math.ceil(len(fullnames) / LISTING_PAGE_SIZE), description=f"r/{subreddit_name} stats refresh")
         except Exception as e:
-            logger.error("Unexpected error in batch fetch: %s", str(e), exc_info=True)
-            return []
+            logger.error("❌ Failed to refresh stats for r/%s: %s", subreddit_name, str(e), exc_info=True)
+            return 0
+        return self.store.update_stats(stats)
 
-    def _format_flattened(self, posts: List[Dict], subreddit_name: str) -> Tuple[List[Dict], str]:
-        """Format and save posts to JSON file"""
-        flattened = [{
-            "title": p['title'],
-            "author": p['author'],
-            "created_utc": p['created_utc'],
-            "score": p['score'],
-            "num_comments": p['num_comments'],
-            "awards": p['awards'],
-            "body": p['body'],
-            "url": p['url'],
-            "flair": p['flair'],
-            "post_id": p['post_id'],
-            "permalink": p['permalink'],
-            "comments": p['comments']
-        } for p in posts]
-
-
-        flattened.sort(key= lambda p: p['created_utc'], reverse=False)
-
-        filename = f"data/raw/{subreddit_name}.json"
-        logging.debug(f"Saving to {filename}")
+    def _fetch_sort_method(self, subreddit_name: str, sort_method: str,
+                           count: int) -> Optional[Tuple[List[RawPost], float]]:
+        """Fetch one sort method, returning the posts and the fetch duration (None on failure)"""
         try:
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(flattened, f, indent=2, ensure_ascii=False)
-        except IOError as e:
-            logging.error(f"Failed to save data: {str(e)}", exc_info=True)
-            raise
+            batch_start = time.time()
+            logger.info("🔍 Processing '%s' sort method for r/%s...", sort_method, subreddit_name)
 
-        return flattened, filename
+            time_filter = 'month' if sort_method in ('top', 'controversial') else None
+            posts = self._fetch_batch(subreddit_name, sort_method, count * 2, time_filter)
 
-    def _transform_post(self, post: praw.models.Submission) -> Dict:
-        """Transform PRAW submission object to dictionary"""
+            logger.debug("Retrieved %d posts from '%s' method", len(posts), sort_method)
+            return posts, time.time() - batch_start
+        except Exception as e:
+            logger.error("❌ Failed %s method: %s", sort_method, str(e), exc_info=True)
+            return None
+
+    def _merge_batches(self, subreddit_name: str, batches: List[Tuple[str, Optional[Tuple[List[RawPost], float]]]],
+                       start_time: float, seen_ids: Optional[set] = None,
+                       writer: Optional['JsonlWriter'] = None) -> List[RawPost]:
+        """Apply the 30-day window and post_id dedup to fetched batches, in sort-method order.
+
+        Each batch's surviving posts get their comments and are appended to ``writer``
+        (when given) as soon as the batch is filtered.
+        """
+        collected_posts = []
+        timings = {'fetch': 0.0, 'filter': 0.0, 'comments': 0.0}
+
+        for batch_posts in filter_batches(subreddit_name, batches, start_time, collected_posts, seen_ids, timings):
+            # Comments are fetched only for posts that survived dedup and the expiry filter
+            if self.get_comments:
+                comments_start = time.time()
+                self._attach_comments(batch_posts, subreddit_name)
+                timings['comments'] += time.time() - comments_start
+
+            if writer is not None:
+                writer.write(batch_posts)
+
+        self.stage_timings[subreddit_name] = timings
+        requests = self.scheduler.stats()
+        logger.info("📡 Requests so far: %d sent | %d throttled | %d retried | %d failed",
+                    requests['requests'], requests['throttled'], requests['retried'], requests['failed'])
+        return collected_posts
+
+    def _fetch_batch(self, subreddit_name: str, sort_method: str, limit: int,
+                     time_filter: str = None) -> List[RawPost]:
+        """Fetch a batch of posts using specified sorting method.
+
+        Transient failures are retried by the scheduler; anything that still fails
+        is raised, so the caller records the batch as failed instead of empty.
+        """
+        logger.debug("Fetching batch: sub=%s, sort=%s, limit=%d, time_filter=%s",
+                     subreddit_name, sort_method, limit, time_filter)
+
+        try:
+            with instrumentation.stage('_fetch_batch', subreddit_name) as span:
+                posts = self.scheduler.call(
+                    self._list_submissions, subreddit_name, sort_method, limit, time_filter,
+                    cost=math.ceil(limit / LISTING_PAGE_SIZE),
+                    description=f"r/{subreddit_name} '{sort_method}' listing")
+                span.items = len(posts)
+        except praw.exceptions.APIException as api_error:
+            logger.error("API Error: %s (%s)", api_error.message, api_error.error_type)
+            raise
+
+        # logger.debug("Executing API request with params: %s", params)
+        logger.debug("Received %d raw posts", len(posts))
+
+        with instrumentation.stage('_transform_post', subreddit_name, items=len(posts)):
+            return self._transform_posts(posts)
+
+    def _list_submissions(self, subreddit_name: str, sort_method: str, limit: int, time_filter: str = None) -> List:
+        """Run the listing request for a sort method and materialize its submissions"""
+        subreddit = self.reddit.subreddit(subreddit_name)
+        # method = getattr(subreddit, sort_method, None)
+        #
+        # if not method:
+        #     logger.warning("Invalid sort method '%s' for subreddit %s",
+        #                    sort_method, subreddit_name)
+        #     return []
+        #
+        # params = {'limit': limit}
+        # if time_filter and hasattr(method, 'time_filter'):
+        #     params['time_filter'] = time_filter
+        if sort_method == 'top':
+            return list(subreddit.top(time_filter=time_filter, limit=limit))
+        elif sort_method == 'controversial':
+            return list(subreddit.controversial(time_filter=time_filter, limit=limit))
+        elif sort_method == 'hot':
+            return list(subreddit.hot(limit=limit))
+        elif sort_method == 'new':
+            return list(subreddit.new(limit=limit))
+        else:
+            raise Exception(f"Invalid sort method: {sort_method}")
+
+    def _transform_post(self, post: praw.models.Submission) -> Optional[RawPost]:
+        """Transform PRAW submission object to a RawPost (None if it cannot be read)"""
         logger.debug("Transforming post ID %s", post.id)
         try:
-            return {
-                'title': post.title,
-                'author': str(post.author) if post.author else '[deleted]',
-                'created_utc': datetime.fromtimestamp(post.created_utc, tz=timezone.utc).isoformat(),
-                'score': post.score,
-                'num_comments': post.num_comments,
-                'awards': post.total_awards_received,
-                'body': post.selftext,
-                'url': post.url,
-                'flair': post.link_flair_text,
-                'post_id': post.id,
-                'permalink': f"https://www.reddit.com{post.permalink}",
-                'comments': self._fetch_top_comments(post.id) if self.get_comments else [],
-            }
+            return RawPost(
+                title=post.title,
+                author=str(post.author) if post.author else '[deleted]',
+                created_utc=datetime.fromtimestamp(post.created_utc, tz=timezone.utc).isoformat(),
+                score=post.score,
+                num_comments=post.num_comments,
+                awards=post.total_awards_received,
+                body=post.selftext,
+                url=post.url,
+                flair=post.link_flair_text,
+                post_id=post.id,
+                permalink=f"https://www.reddit.com{post.permalink}",
+            )
         except Exception as e:
             logger.warning("Failed to transform post ID %s: %s", post.id, str(e))
-            return {}
+            return None
+
+    def _transform_posts(self, submissions: List[praw.models.Submission]) -> List[RawPost]:
+        posts = (self._transform_post(s) for s in submissions)
+        return [p for p in posts if p is not None]
+
+    def _attach_comments(self, posts: List[RawPost], subreddit_name: Optional[str] = None) -> None:
+        """Fetch top comments for many posts concurrently, bounded by the per-client request cap"""
+        if not posts:
+            return
+        logger.info("💬 Fetching top comments for %d posts (workers: %d)", len(posts), self.max_concurrency)
+        with instrumentation.stage('_fetch_top_comments', subreddit_name, items=len(posts)), \
+                ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="reddit-comments") as pool:
+            for post, comments in zip(posts, pool.map(self._fetch_top_comments, [p.post_id for p in posts])):
+                post.comments = comments
+
+    def _fetch_top_comments(self, post_id: str, limit: int = 3) -> List[RawComment]:
+        """Fetch top comments from a post; transient failures are retried by the scheduler"""
+        logger.debug("Fetching top %d comments for post %s", limit, post_id)
+        try:
+            comments = self.scheduler.call(self._request_top_comments, post_id, limit,
+                                           description=f"Comment fetch for post {post_id}")
+        except Exception as e:
+            logger.error("Failed to fetch comments for post %s: %s", post_id, str(e), exc_info=True)
+            return []
+        logger.debug("Fetched %d top comments for post %s", len(comments), post_id)
+        return comments
 
-    def _fetch_top_comments(self, post_id: str, limit: int = 3) -> List[Dict]:
-        """Fetch top comments from a post"""
-        logging.info(f"Fetching top {limit} comments for post {post_id}")
+    def _request_top_comments(self, post_id: str, limit: int) -> List[RawComment]:
+        """Load a submission's top-level comments and keep the first ``limit`` valid ones"""
         submission = self.reddit.submission(id=post_id)
         submission.comment_sort = 'top'
         submission.comment_limit = limit * 2  # Fetch extra to account for removed comments
 
-        comments = []
-        try:
-            submission.comments.replace_more(limit=0)
-            valid_comments = [c for c in submission.comments if not c.body == '[removed]']
-            for comment in valid_comments[:limit]:
-                comments.append({
-                    'author': str(comment.author) if comment.author else '[deleted]',
-                    'body': comment.body,
-                    'score': comment.score,
-                    'created_utc': datetime.utcfromtimestamp(comment.created_utc).isoformat() + 'Z'
-                })
-        except Exception as e:
-            logging.error(f"Failed to fetch comments: {str(e)}", exc_info=True)
-
-        logging.info(f"Fetched {len(comments)} top comments for post {post_id}")
-        return comments
+        submission.comments.replace_more(limit=0)
+        valid_comments = [c for c in submission.comments if not c.body == '[removed]']
+        return [RawComment(
+            author=str(comment.author) if comment.author else '[deleted]',
+            body=comment.body,
+            score=comment.score,
+            created_utc=datetime.utcfromtimestamp(comment.created_utc).isoformat() + 'Z'
+        ) for comment in valid_comments[:limit]]
 
     def __del__(self):
         logging.debug("RedditScraper instance destroyed")
\ No newline at end of file
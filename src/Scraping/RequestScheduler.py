@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Retry policy for transient failures (429s, 5xx, timeouts and connection errors)
+REQUEST_RETRIES = 4
+REQUEST_BACKOFF = 1.0       # seconds; the cap doubles on every attempt
+MAX_BACKOFF = 60.0
+# Requests kept in reserve at the end of a rate-limit window, for other clients of the budget
+BUDGET_RESERVE = 2
+# How often to re-check a spent budget when the headers do not say when it resets
+POLL_INTERVAL = 0.5
+
+
+def _loaded(module: str):
+    # PRAW's exception types are only looked up once something has imported PRAW:
+    # an error cannot come from a library that was never loaded, and the asyncio
+    # client does not need PRAW at all.
+    return sys.modules.get(module)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    prawcore = _loaded('prawcore.exceptions')
+    return (prawcore is not None and isinstance(error, prawcore.TooManyRequests)) \
+        or getattr(error, 'status', None) == 429
+
+
+def is_transient(error: Exception) -> bool:
+    """Failures worth retrying: rate limiting, server errors and network problems"""
+    if getattr(error, 'transient', False):  # e.g. AsyncRedditScraper's HTTP errors
+        return True
+    prawcore = _loaded('prawcore.exceptions')
+    if prawcore is not None and isinstance(
+            error, (prawcore.TooManyRequests, prawcore.ServerError, prawcore.RequestException)):
+        return True
+    praw = _loaded('praw.exceptions')
+    if praw is not None and isinstance(error, praw.RedditAPIException):
+        return any(item.error_type == 'RATELIMIT' for item in error.items)
+    return False
+
+
+class RequestScheduler:
+    """Paces and retries the Reddit requests of one OAuth budget.
+
+    Before each call it reads the budget Reddit reports in its rate-limit headers
+    (``reddit.auth.limits``: requests remaining and when the window resets). It
+    spreads requests over what is left of the window instead of bursting until
+    a 429. Transient failures are retried with full-jitter exponential
+    backoff, honouring ``retry-after`` on 429s. ``max_concurrency`` caps requests
+    in flight. Collections running on several threads, or several scrapers using
+    the same credentials, share the budget by sharing one scheduler.
+    """
+
+    def __init__(self, limits: Optional[Callable[[], Dict]] = None, max_concurrency: int = 4,
+                 retries: int = REQUEST_RETRIES, backoff: float = REQUEST_BACKOFF,
+                 max_backoff: float = MAX_BACKOFF, reserve: int = BUDGET_RESERVE,
+                 poll_interval: float = POLL_INTERVAL):
+        self.limits = limits
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.reserve = reserve
+        self.poll_interval = poll_interval
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+        self._in_flight = 0
+        self.counters = {'requests': 0, 'throttled': 0, 'retried': 0, 'failed': 0}
+        self._random = random.Random()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def _acquire(self, cost: int) -> Tuple[float, bool]:
+        """Take ``cost`` requests of budget, or say how long to wait before asking again.
+
+        Returns ``(delay, budget_spent)``; a zero delay means the budget was taken.
+
+        While more than half of the window's budget is left, calls go straight
+        through, so short collections are not slowed down. After that the rest
+        of the budget is spread evenly over the rest of the window. Once it is
+        spent, calls wait for the reset. Requests still in flight count against
+        the budget, since the headers only reflect finished ones.
+        """
+        limits = self.limits() if self.limits is not None else None
+        remaining = limits.get('remaining') if limits else None
+        reset = limits.get('reset_timestamp') if limits else None
+
+        with self._lock:
+            now = time.time()
+            if remaining is not None and reset is not None:
+                total = remaining + (limits.get('used') or 0)
+                if now >= reset:
+                    # The window these headers describe is over; assume a fresh budget
+                    remaining, reset = total, None
+                remaining -= self._in_flight
+                usable = remaining - self.reserve
+                if usable < cost:
+                    return (reset - now if reset is not None else self.poll_interval), True
+                if remaining <= total / 2 and reset is not None:
+                    if now < self._next_start:
+                        return self._next_start - now, False
+                    self._next_start = now + cost * (reset - now) / usable
+            self._in_flight += cost
+            return 0.0, False
+
+    def _release(self, cost: int) -> None:
+        with self._lock:
+            self._in_flight -= cost
+
+    def _wait_seconds(self, cost: int) -> Iterator[float]:
+        """Delays to sleep before this call may start; budget is taken when it ends"""
+        throttled = False
+        while True:
+            delay, budget_spent = self._acquire(cost)
+            if delay <= 0:
+                return
+            if budget_spent and not throttled:
+                throttled = True
+                self._count('throttled')
+                logger.debug("Waiting %.2fs for rate-limit budget", delay)
+            yield delay
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after:
+            return float(retry_after)
+        return self._random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _failed(self, error: Exception, attempt: int, description: str) -> float:
+        """Count a failed attempt and return the backoff before the next one, or re-raise"""
+        if not is_transient(error) or attempt == self.retries:
+            self._count('failed')
+            raise error
+        if _is_rate_limited(error):
+            self._count('throttled')
+        self._count('retried')
+        delay = self._retry_delay(error, attempt)
+        logger.warning("%s failed (%s), retry %d/%d in %.1fs",
+                       description, str(error), attempt + 1, self.retries, delay)
+        return delay
+
+    def call(self, func: Callable, *args, cost: int = 1, description: str = "request", **kwargs):
+        """Run ``func(*args, **kwargs)`` as ``cost`` requests, retrying transient failures.
+
+        Non-transient errors, and transient ones that outlast the retries, are raised.
+        """
+        for attempt in range(self.retries + 1):
+            for delay in self._wait_seconds(cost):
+                time.sleep(delay)
+            try:
+                with self._slots:
+                    self._count('requests')
+                    return func(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(e, attempt, description)
+            finally:
+                self._release(cost)
+            time.sleep(delay)
+
+    async def call_async(self, func: Callable, *args, cost: int = 1, description: str = "request", **kwargs):
+        """``call`` for coroutine functions; waits with ``asyncio.sleep`` so the event loop keeps running.
+
+        Concurrency is left to the caller (e.g. the HTTP connection pool), since
+        ``max_concurrency`` is enforced with a thread semaphore.
+        """
+        for attempt in range(self.retries + 1):
+            for delay in self._wait_seconds(cost):
+                await asyncio.sleep(delay)
+            try:
+                self._count('requests')
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(e, attempt, description)
+            finally:
+                self._release(cost)
+            await asyncio.sleep(delay)
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.Pipeline.records import RawPost
+
+# Shared by RedditScraper and AsyncRedditScraper: the sort methods collected, the
+# 30-day window and dedup filter, and the raw JSONL output. Kept free of PRAW so the
+# asyncio client does not pay for importing it.
+
+logger = logging.getLogger(__name__)
+
+SORT_METHODS = [
+    # 'hot',
+    # 'new',
+    'top',
+    # 'rising',
+    'controversial'
+]
+
+# Reddit allows ~100 requests/minute per OAuth client; a handful of in-flight
+# requests per client keeps us well inside that budget.
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Listings return at most this many posts per request
+LISTING_PAGE_SIZE = 100
+
+
+def raw_filename(subreddit_name: str) -> str:
+    return f"data/raw/{subreddit_name}.jsonl"
+
+
+def filter_batches(subreddit_name: str, batches: List[Tuple[str, Optional[Tuple[List[RawPost], float]]]],
+                   start_time: float, collected_posts: List[RawPost], seen_ids: Optional[set] = None,
+                   timings: Optional[Dict[str, float]] = None) -> Iterator[List[RawPost]]:
+    """Apply the 30-day window and post_id dedup to fetched batches, in sort-method order.
+
+    Yields each batch's surviving posts (also appended to ``collected_posts``), so
+    the caller can fetch their comments and write them out before the next batch
+    is filtered. ``timings`` accumulates fetch/filter seconds; the caller adds
+    'comments'. Totals are logged once every batch has been consumed.
+    """
+    seen_ids = set() if seen_ids is None else seen_ids
+    timings = {'fetch': 0.0, 'filter': 0.0, 'comments': 0.0} if timings is None else timings
+    start_date = datetime.now(timezone.utc) - timedelta(days=30)
+
+    logger.debug("Filtering posts newer than %s (UTC)", start_date.isoformat())
+
+    total_processed = 0
+    total_duplicates = 0
+    total_expired = 0
+
+    for sort_method, fetched in batches:
+        if fetched is None:
+            continue
+        posts, fetch_time = fetched
+        timings['fetch'] += fetch_time
+        batch_start = time.time()
+        batch_duplicates = 0
+        batch_expired = 0
+        batch_posts = []
+
+        for post in posts:
+            total_processed += 1
+            post_date = datetime.fromisoformat(post.created_utc)
+
+            if post_date < start_date:
+                batch_expired += 1
+                logger.debug("Skipping expired post ID %s (created: %s)",
+                             post.post_id, post_date.isoformat())
+                continue
+
+            if post.post_id in seen_ids:
+                batch_duplicates += 1
+                logger.debug("Duplicate post ID %s found", post.post_id)
+                continue
+
+            seen_ids.add(post.post_id)
+            batch_posts.append(post)
+            logger.debug("✅ Added post ID %s (Score: %d, Comments: %d)",
+                         post.post_id, post.score, post.num_comments)
+
+        collected_posts.extend(batch_posts)
+        total_duplicates += batch_duplicates
+        total_expired += batch_expired
+        logger.info((
+            "🏁 Batch complete (r/%s, %s): %d new, %d duplicates, %d expired "
+            "(%.2fs) | Total: %d"
+        ), subreddit_name, sort_method, len(posts) - batch_duplicates - batch_expired,
+            batch_duplicates, batch_expired,
+           fetch_time + time.time() - batch_start, len(collected_posts))
+        timings['filter'] += time.time() - batch_start
+
+        yield batch_posts
+
+    logger.info("⏱️ Stage timings for r/%s: fetch %.2fs | filter %.2fs | comments %.2fs",
+                subreddit_name, timings['fetch'], timings['filter'], timings['comments'])
+
+    logger.info((
+        "📊 Collection complete for r/%s\n"
+        "Total processed: %d | Valid: %d | Duplicates: %d | Expired: %d\n"
+        "Elapsed time: %.2fs"
+    ), subreddit_name, total_processed, len(collected_posts),
+        total_duplicates, total_expired, time.time() - start_time)
+
+
+class JsonlWriter:
+    """Append-only raw post file, one JSON object per line.
+
+    Posts are written as they arrive, so a collection never needs the whole
+    subreddit in memory at once just to serialize it.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        logger.debug("Saving to %s", filename)
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            self._file = open(filename, "w", encoding="utf-8")
+        except IOError as e:
+            logger.error("Failed to open %s: %s", filename, str(e), exc_info=True)
+            raise
+
+    def write(self, posts: List[RawPost]) -> None:
+        self._file.writelines(json.dumps(p.to_json(), ensure_ascii=False) + "\n" for p in posts)
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
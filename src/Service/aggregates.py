@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = "data/PostEDA"
+DEFAULT_CACHE_SIZE = 256
+WATCH_INTERVAL = 2.0  # seconds between scans of the output directory
+# Export.json has one row per preprocessing block (3 days by default), dated by the
+# block's first post, so 'block' is the finest granularity available. Week and month
+# rollups assign each whole block to the period its first day falls in: a block that
+# straddles a Monday or a month boundary is counted entirely in the earlier period.
+PERIODS = ('block', 'week', 'month')
+# Subdirectories of the output directory that are not a company's results
+RESERVED_DIRS = {'combined'}
+
+
+def period_start(day: date, period: str) -> date:
+    """First day of the block (``day`` itself), ISO week (Monday) or month containing ``day``"""
+    if period == 'block':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    raise ValueError(f"Unknown period '{period}', expected one of {PERIODS}")
+
+
+def rollup(rows: List[Dict], period: str) -> List[Dict]:
+    """Export.json rows grouped into periods, oldest first.
+
+    Averages are weighted by each block's post count, so a period's
+    avg_sentiment is the mean over its posts rather than over its blocks.
+    Blocks without comment sentiment are left out of avg_comment_sentiment.
+    Blocks are never split across periods.
+    """
+    groups: Dict[date, Dict] = {}
+    for row in rows:
+        start = period_start(row['block_start'], period)
+        group = groups.get(start)
+        if group is None:
+            group = groups[start] = {'posts': 0, 'comments': 0, 'sentiment': 0.0, 'sentiment_posts': 0,
+                                     'comment_sentiment': 0.0, 'comment_posts': 0}
+        posts = row['num_posts']
+        group['posts'] += posts
+        group['comments'] += row['num_comments']
+        if row['avg_sentiment'] is not None:
+            group['sentiment'] += row['avg_sentiment'] * posts
+            group['sentiment_posts'] += posts
+        if row['avg_comment_sentiment'] is not None:
+            group['comment_sentiment'] += row['avg_comment_sentiment'] * posts
+            group['comment_posts'] += posts
+    return [{
+        'period_start': start.isoformat(),
+        'avg_sentiment': g['sentiment'] / g['sentiment_posts'] if g['sentiment_posts'] else None,
+        'avg_comment_sentiment': g['comment_sentiment'] / g['comment_posts'] if g['comment_posts'] else None,
+        'num_comments': g['comments'],
+        'num_posts': g['posts'],
+    } for start, g in sorted(groups.items())]
+
+
+class CompanyAggregates(NamedTuple):
+    company: str
+    version: Tuple                      # (mtime, size) of Export.json and Words.json when loaded
+    rollups: Dict[str, List[Dict]]      # period -> rows sorted by period_start
+    keys: Dict[str, List[str]]          # period -> period_start of every row, for bisecting
+    words: List[Dict]
+
+    def between(self, period: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict]:
+        """Rollup rows whose period starts within [start, end] (ISO dates, both optional)"""
+        keys = self.keys[period]
+        lo = bisect_left(keys, start) if start else 0
+        hi = bisect_right(keys, end) if end else len(keys)
+        return self.rollups[period][lo:hi]
+
+    def summary(self) -> Dict:
+        blocks = self.keys['block']
+        return {
+            'company': self.company,
+            'first_block': blocks[0] if blocks else None,
+            'last_block': blocks[-1] if blocks else None,
+            'num_posts': sum(row['num_posts'] for row in self.rollups['block']),
+        }
+
+
+def load_company(path: str, company: str, version: Tuple) -> CompanyAggregates:
+    with open(os.path.join(path, 'Export.json'), 'r', encoding='utf-8') as f:
+        export = json.load(f)
+    words_path = os.path.join(path, 'Words.json')
+    words = []
+    if os.path.exists(words_path):
+        with open(words_path, 'r', encoding='utf-8') as f:
+            words = json.load(f)
+    rows = [{**row, 'block_start': date.fromisoformat(row['date'][:10])} for row in export]
+    rollups = {period: rollup(rows, period) for period in PERIODS}
+    keys = {period: [row['period_start'] for row in period_rows] for period, period_rows in rollups.items()}
+    return CompanyAggregates(company, version, rollups, keys, words)
+
+
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry beyond ``maxsize``"""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Computed outside the lock; two threads racing on one key just compute it twice
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+class AggregateStore:
+    """In-memory rollups of every company's Export.json/Words.json under ``root``.
+
+    ``refresh`` re-reads only the companies whose files changed (by mtime and
+    size) and drops the ones that disappeared; ``watch`` runs it on a background
+    thread. Range queries are served from an LRU cache whose keys include the
+    company's file version, so a reload never serves stale results.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.root = root
+        self.companies: Dict[str, CompanyAggregates] = {}
+        self.cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _version(path: str) -> Optional[Tuple]:
+        version = []
+        for name in ('Export.json', 'Words.json'):
+            try:
+                stat = os.stat(os.path.join(path, name))
+            except FileNotFoundError:
+                if name == 'Export.json':
+                    return None
+                version.append(None)
+                continue
+            version.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def refresh(self) -> List[str]:
+        """Reload changed companies; returns the names that were (re)loaded or removed"""
+        found = {}
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                path = os.path.join(self.root, name)
+                if name in RESERVED_DIRS or not os.path.isdir(path):
+                    continue
+                version = self._version(path)
+                if version is not None:
+                    found[name] = (path, version)
+
+        changed = []
+        for name, (path, version) in found.items():
+            current = self.companies.get(name)
+            if current is not None and current.version == version:
+                continue
+            try:
+                aggregates = load_company(path, name, version)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # Most likely a file caught mid-write; keep what we have and retry next scan
+                logger.warning("Could not load results for %s: %s", name, e)
+                continue
+            with self._lock:
+                self.companies[name] = aggregates
+            changed.append(name)
+        for name in set(self.companies) - set(found):
+            with self._lock:
+                del self.companies[name]
+            changed.append(name)
+        if changed:
+            logger.info("Reloaded results for %s", ", ".join(changed))
+        return changed
+
+    def get(self, company: str) -> Optional[CompanyAggregates]:
+        with self._lock:
+            return self.companies.get(company)
+
+    def summaries(self) -> List[Dict]:
+        with self._lock:
+            companies = list(self.companies.values())
+        return [c.summary() for c in sorted(companies, key=lambda c: c.company)]
+
+    def query(self, company: str, period: str = 'block', start: Optional[str] = None,
+              end: Optional[str] = None) -> Optional[List[Dict]]:
+        """Rollup rows of ``company`` for ``period`` between ``start`` and ``end``, or None if unknown"""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period '{period}', expected one of {PERIODS}")
+        aggregates = self.get(company)
+        if aggregates is None:
+            return None
+        key = (company, aggregates.version, period, start, end)
+        return self.cache.get_or_compute(key, lambda: aggregates.between(period, start, end))
+
+    def watch(self, interval: float = WATCH_INTERVAL) -> None:
+        """Rescan the output directory every ``interval`` seconds on a daemon thread"""
+        if self._watcher is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("Scanning %s failed", self.root)
+
+        self._watcher = threading.Thread(target=run, name="aggregates-watch", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
@@ -0,0 +1,137 @@
+import argparse
+import json
+import logging
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from src.Service.aggregates import (DEFAULT_CACHE_SIZE, DEFAULT_ROOT, PERIODS, WATCH_INTERVAL,
+                                    AggregateStore)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8050
+
+
+class AggregatesHandler(BaseHTTPRequestHandler):
+    """Read-only JSON API over an ``AggregateStore``.
+
+    GET /health                                         cache and company counts
+    GET /companies                                      companies with their date range
+    GET /companies/<name>/rollups?period=week&start=&end=   block/week/month rollups in a date range
+    GET /companies/<name>/words                         Words.json
+
+    A block is one Export.json row (the pipeline's multi-day preprocessing block);
+    week and month rows are built from whole blocks, see ``aggregates.PERIODS``.
+    """
+    store: AggregateStore  # Set on the subclass make_server builds
+    server_version = "SentimentAggregates/1.0"
+
+    def _send(self, status: HTTPStatus, payload, head: bool = False) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def _error(self, status: HTTPStatus, message: str, head: bool = False) -> None:
+        self._send(status, {'error': message}, head)
+
+    def do_GET(self, head: bool = False):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.split('/') if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            status, payload = self._route(parts, query)
+        except ValueError as e:
+            status, payload = HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        self._send(status, payload, head)
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def _route(self, parts, query: Dict[str, str]):
+        store = self.store
+        if parts == ['health']:
+            return HTTPStatus.OK, {'companies': len(store.companies), 'cache': store.cache.stats()}
+        if parts == ['companies']:
+            return HTTPStatus.OK, store.summaries()
+        if len(parts) == 3 and parts[0] == 'companies':
+            company, resource = parts[1], parts[2]
+            if resource == 'rollups':
+                period = query.get('period', 'block')
+                if period not in PERIODS:
+                    raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+                start, end = _iso_date(query.get('start')), _iso_date(query.get('end'))
+                rows = store.query(company, period, start, end)
+                if rows is not None:
+                    return HTTPStatus.OK, {'company': company, 'period': period, 'rows': rows}
+            elif resource == 'words':
+                aggregates = store.get(company)
+                if aggregates is not None:
+                    return HTTPStatus.OK, aggregates.words
+            else:
+                return HTTPStatus.NOT_FOUND, {'error': f"Unknown resource '{resource}'"}
+            return HTTPStatus.NOT_FOUND, {'error': f"Unknown company '{company}'"}
+        return HTTPStatus.NOT_FOUND, {'error': f"Unknown path '{self.path}'"}
+
+    def _read_only(self):
+        self._error(HTTPStatus.METHOD_NOT_ALLOWED, "This service is read-only")
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = _read_only
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def _iso_date(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"'{value}' is not a YYYY-MM-DD date") from None
+
+
+def make_server(store: AggregateStore, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """HTTP server for ``store`` (not started); port 0 picks a free port"""
+    handler = type('BoundAggregatesHandler', (AggregatesHandler,), {'store': store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve per-company sentiment rollups from the analysis outputs.")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Directory holding <company>/Export.json.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help="Range queries kept in the LRU cache.")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL,
+                        help="Seconds between checks of the output directory for changed files.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    store = AggregateStore(args.root, cache_size=args.cache_size)
+    store.refresh()
+    store.watch(args.interval)
+    server = make_server(store, args.host, args.port)
+    logger.info("Serving %d companies from %s on http://%s:%d", len(store.companies), args.root,
+                *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.stop()
+
+
+if __name__ == '__main__':
+    main()